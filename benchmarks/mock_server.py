@@ -0,0 +1,168 @@
+"""
+Local stand-in for the Perplexity /chat/completions endpoint.
+
+Used by the benchmarks so they run offline and measure Orcha's own overhead.
+Latency, jitter, error rate and reply length are configurable; requests with
+"stream": true get a server-sent-events reply.
+
+Run standalone:
+    python benchmarks/mock_server.py --port 8765 --latency 0.05
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping keep-alive connections is expected, not worth a traceback
+        pass
+
+
+class MockPerplexityServer:
+    """Threaded mock API server; use as a context manager or call start()/stop()"""
+
+    def __init__(self,
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 latency: float = 0.02,
+                 jitter: float = 0.0,
+                 error_rate: float = 0.0,
+                 reply_words: int = 20,
+                 seed: int = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.reply_words = reply_words
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+        self.httpd = _QuietHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _delay(self) -> float:
+        with self._lock:
+            return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            failed = self.random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+            return failed
+
+    def _reply(self, messages) -> str:
+        system = messages[0]["content"] if messages and messages[0]["role"] == "system" else ""
+        if "sentiment" in system:
+            return "positive"
+        if "topic" in system:
+            return "technology"
+        return " ".join(["token"] * self.reply_words)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately; avoid Nagle/delayed-ACK stalls
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status: int, body: dict, headers: dict = None):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+
+                if not self.path.endswith("/chat/completions"):
+                    self._send_json(404, {"error": "not found"})
+                    return
+
+                time.sleep(server._delay())
+
+                if server._should_fail():
+                    self._send_json(503, {"error": "mock failure"}, {"Retry-After": "0"})
+                    return
+
+                messages = body.get("messages", [])
+                reply = server._reply(messages)
+                prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+                usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(reply.split())}
+
+                if body.get("stream"):
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.send_header("Connection", "close")
+                    self.end_headers()
+                    for word in reply.split(" "):
+                        chunk = {"choices": [{"delta": {"content": word + " "}}]}
+                        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                        self.wfile.flush()
+                    final = {"choices": [], "usage": usage}
+                    self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+                    self.close_connection = True
+                    return
+
+                self._send_json(200, {
+                    "model": body.get("model"),
+                    "choices": [{"message": {"role": "assistant", "content": reply}}],
+                    "usage": usage,
+                })
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock Perplexity API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random +/- seconds added to latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--reply-words", type=int, default=20)
+    args = parser.parse_args()
+
+    mock = MockPerplexityServer(args.host, args.port, args.latency, args.jitter, args.error_rate, args.reply_words)
+    print(f"Mock Perplexity API listening on {mock.base_url}")
+    try:
+        mock.httpd.serve_forever()
+    except KeyboardInterrupt:
+        mock.stop()
@@ -0,0 +1,214 @@
+"""
+Offline benchmark suite for Orcha.
+
+Every scenario runs against the local mock server in mock_server.py, so the
+numbers measure Orcha's own overhead plus the configured mock latency. Results
+are written as JSON so runs can be compared over time.
+
+Usage:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --scenario fan_out --latency 0.05 --jitter 0.02
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/previous.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from mock_server import MockPerplexityServer
+from orcha import PerplexityModel, HTTPTransport, RetryPolicy, execute_graph
+from orcha.metrics import Histogram
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def make_model(base_url: str) -> PerplexityModel:
+    """Model pointed at the mock server, with quick retries for injected errors"""
+    return PerplexityModel(
+        api_key="benchmark",
+        model="sonar-pro",
+        base_url=base_url,
+        transport=HTTPTransport(pool_size=32),
+        retry=RetryPolicy(max_retries=3, base_delay=0.01, max_delay=0.1),
+    )
+
+
+def timed(histogram: Histogram, func, *args, **kwargs):
+    """Call func and record its duration in histogram"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    histogram.observe(time.perf_counter() - start)
+    return result
+
+
+def scenario_single_ask(model: PerplexityModel, size: int) -> dict:
+    """Sequential model.ask calls"""
+    latency = Histogram()
+    for index in range(size):
+        timed(latency, model.ask, f"Question {index}")
+    return {"operations": size, "latency": latency}
+
+
+def scenario_linear_chain(model: PerplexityModel, size: int) -> dict:
+    """One long execute_chain alternating model calls and plain Python steps"""
+    steps = []
+    for _ in range(size):
+        steps.append(lambda text: model.ask(f"Rewrite: {text[:200]}"))
+        steps.append(lambda text: text.strip().lower())
+    latency = Histogram()
+    timed(latency, model.execute_chain, steps, "Start of the chain")
+    return {"operations": len(steps), "latency": latency}
+
+
+def scenario_fan_out(model: PerplexityModel, size: int) -> dict:
+    """Wide graph: many independent model branches merged by one step"""
+    graph = [{"id": f"branch_{index}", "run": lambda text, i=index: model.ask(f"{text} #{i}")}
+             for index in range(size)]
+    graph.append({"id": "merge", "inputs": [step["id"] for step in graph], "run": lambda outputs: len(outputs)})
+    latency = Histogram()
+    timed(latency, execute_graph, graph, "Fan out input", max_parallelism=16)
+    return {"operations": size, "latency": latency}
+
+
+def scenario_classification(model: PerplexityModel, size: int) -> dict:
+    """Sentiment classification of many texts through AITools.prediction"""
+    model.tools.clear_tools()
+    model.tools.prediction(task_type="sentiment", categories=["positive", "negative", "neutral"],
+                           output_format="simple")
+    latency = Histogram()
+    for index in range(size):
+        timed(latency, model.ask, f"I really enjoyed product number {index}.")
+    model.tools.clear_tools()
+    return {"operations": size, "latency": latency}
+
+
+def scenario_stream(model: PerplexityModel, size: int) -> dict:
+    """Streaming replies, recording time to first token"""
+    latency = Histogram()
+    first_token = Histogram()
+    for index in range(size):
+        start = time.perf_counter()
+        chunks = model.ask_stream(f"Stream {index}")
+        next(chunks)
+        first_token.observe(time.perf_counter() - start)
+        for _ in chunks:
+            pass
+        latency.observe(time.perf_counter() - start)
+    return {"operations": size, "latency": latency, "first_token": first_token}
+
+
+SCENARIOS = {
+    "single_ask": (scenario_single_ask, 50),
+    "linear_chain": (scenario_linear_chain, 25),
+    "fan_out": (scenario_fan_out, 64),
+    "classification": (scenario_classification, 50),
+    "stream": (scenario_stream, 20),
+}
+
+
+def run_scenario(name: str, size: int, base_url: str, measure_memory: bool = True) -> dict:
+    """
+    Run one scenario on a fresh model and measure throughput.
+    Peak memory is measured in a separate pass because tracemalloc slows
+    everything down and would distort the timings.
+    """
+    func, default_size = SCENARIOS[name]
+    size = size or default_size
+
+    model = make_model(base_url)
+    start = time.perf_counter()
+    outcome = func(model, size)
+    elapsed = time.perf_counter() - start
+    model.transport.close()
+
+    result = {
+        "operations": outcome["operations"],
+        "elapsed_seconds": elapsed,
+        "throughput_per_second": outcome["operations"] / elapsed if elapsed else 0.0,
+        "latency_seconds": outcome["latency"].summary(),
+    }
+    if "first_token" in outcome:
+        result["first_token_seconds"] = outcome["first_token"].summary()
+
+    if measure_memory:
+        model = make_model(base_url)
+        tracemalloc.start()
+        func(model, size)
+        _, result["peak_memory_bytes"] = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        model.transport.close()
+
+    return result
+
+
+def compare(current: dict, previous_path: str):
+    """Print throughput and p95 changes against a previous results file"""
+    with open(previous_path, 'r') as f:
+        previous = json.load(f)
+    print(f"\nComparison with {previous_path}:")
+    for name, result in current["scenarios"].items():
+        before = previous.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        throughput_change = result["throughput_per_second"] / before["throughput_per_second"] - 1
+        p95_change = result["latency_seconds"]["p95"] / (before["latency_seconds"]["p95"] or 1e-9) - 1
+        print(f"  {name:<16} throughput {throughput_change:+7.1%}   p95 latency {p95_change:+7.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Orcha benchmarks against a local mock API")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario to run (repeatable, default: all)")
+    parser.add_argument("--size", type=int, default=0, help="Override the scenario size")
+    parser.add_argument("--latency", type=float, default=0.02, help="Mock server latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Mock server latency jitter in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of mock requests that fail")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the peak memory pass")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="Previous results file to compare against")
+    args = parser.parse_args()
+
+    mock_config = {"latency": args.latency, "jitter": args.jitter, "error_rate": args.error_rate}
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "mock_server": mock_config,
+        "scenarios": {},
+    }
+
+    with MockPerplexityServer(seed=0, **mock_config) as mock:
+        for name in args.scenario or list(SCENARIOS):
+            print(f"Running {name}...")
+            result = run_scenario(name, args.size, mock.base_url, measure_memory=not args.no_memory)
+            results["scenarios"][name] = result
+            latency = result["latency_seconds"]
+            line = (f"  {result['operations']} ops in {result['elapsed_seconds']:.2f}s "
+                    f"({result['throughput_per_second']:.1f}/s), "
+                    f"p50 {latency['p50'] * 1000:.1f}ms p95 {latency['p95'] * 1000:.1f}ms "
+                    f"p99 {latency['p99'] * 1000:.1f}ms")
+            if "peak_memory_bytes" in result:
+                line += f", peak memory {result['peak_memory_bytes'] / 1024:.0f} KiB"
+            print(line)
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+CLI startup-time benchmark with a regression budget.
+
+Runs each command under `python -X importtime`, sums the import time of every
+module it loads beyond a bare interpreter, checks that no heavy module is
+imported where it should not be, and measures end-to-end wall time. Exits
+non-zero when a command goes over its budget in startup_budget.json.
+
+Usage:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 20 --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+BUDGET_FILE = os.path.join(os.path.dirname(__file__), "startup_budget.json")
+
+
+def imported_modules(args: list) -> dict:
+    """Run python -X importtime with args and return {module: self_time_us}"""
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime"] + args,
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    modules = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(self_us)
+    return modules
+
+
+def wall_time(args: list, runs: int) -> float:
+    """Median wall-clock seconds to run python with args"""
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=ROOT, env=env, capture_output=True)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Orcha import and CLI startup time")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per command for wall time")
+    parser.add_argument("--budget", default=BUDGET_FILE, help="Budget file")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    with open(args.budget, 'r') as f:
+        budgets = json.load(f)
+
+    baseline = set(imported_modules(["-c", "pass"]))
+    results = {}
+    failures = []
+
+    for name, budget in budgets.items():
+        command = budget["command"]
+        modules = {module: us for module, us in imported_modules(command).items() if module not in baseline}
+        import_ms = sum(modules.values()) / 1000.0
+        forbidden = sorted(module for module in budget.get("forbidden_modules", []) if module in modules)
+        wall_ms = wall_time(command, args.runs) * 1000.0
+        slowest = sorted(modules.items(), key=lambda item: item[1], reverse=True)[:5]
+
+        results[name] = {
+            "import_ms": import_ms,
+            "wall_ms": wall_ms,
+            "modules": len(modules),
+            "forbidden_imported": forbidden,
+            "slowest_imports": [{"module": module, "self_ms": us / 1000.0} for module, us in slowest],
+        }
+
+        status = "ok"
+        if import_ms > budget["max_import_ms"]:
+            failures.append(f"{name}: imports took {import_ms:.1f}ms (budget {budget['max_import_ms']}ms)")
+            status = "OVER BUDGET"
+        if forbidden:
+            failures.append(f"{name}: imported {', '.join(forbidden)}")
+            status = "OVER BUDGET"
+
+        print(f"{name:<24} imports {import_ms:7.1f}ms / {budget['max_import_ms']}ms   "
+              f"wall {wall_ms:7.1f}ms   {len(modules)} modules   {status}")
+        for module, us in slowest:
+            print(f"    {module:<40} {us / 1000.0:6.1f}ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if failures:
+        print("\nStartup budget exceeded:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
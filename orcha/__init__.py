@@ -1,6 +1,83 @@
-from .models import BaseModel, PerplexityModel
-from .chains import execute_chain
-from .tools import AITools
+import importlib
+from typing import TYPE_CHECKING
 
 __version__ = "0.1.0"
-__all__ = ["BaseModel", "PerplexityModel", "execute_chain", "AITools"]
+
+# Public names and the submodule that defines each. Submodules are imported on
+# first attribute access so `import orcha` stays cheap and does not pull in the
+# HTTP stack until a model is actually used.
+_exports = {
+    "BaseModel": ".models",
+    "PerplexityModel": ".models",
+    "BatchResults": ".models",
+    "execute_chain": ".chains",
+    "execute_chain_async": ".chains",
+    "execute_chain_stream": ".chains",
+    "execute_graph": ".chains",
+    "map_step": ".chains",
+    "execution": ".executors",
+    "configure_executors": ".executors",
+    "AITools": ".tools",
+    "HTTPTransport": ".transport",
+    "ResponseCache": ".cache",
+    "RateLimiter": ".ratelimit",
+    "RetryPolicy": ".ratelimit",
+    "get_rate_limiter": ".ratelimit",
+    "MetricsAggregator": ".metrics",
+    "add_hook": ".metrics",
+    "remove_hook": ".metrics",
+    "run_jsonl_batch": ".batch",
+    "JobQueue": ".jobqueue",
+    "run_worker": ".jobqueue",
+    "CheckpointStore": ".checkpoint",
+    "OrchaServer": ".server",
+    "ChatSession": ".session",
+    "SemanticCache": ".semantic_cache",
+    "SingleFlight": ".singleflight",
+    "HedgePolicy": ".hedging",
+    "RequestScheduler": ".scheduler",
+    "request_context": ".scheduler",
+    "estimate_tokens": ".tokens",
+    "estimate_message_tokens": ".tokens",
+    "OrchaError": ".errors",
+    "APIRequestError": ".errors",
+    "DeadlineExceeded": ".errors",
+    "ErrorResponse": ".errors",
+}
+
+__all__ = list(_exports)
+
+
+def __getattr__(name):
+    module_name = _exports.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
+
+
+if TYPE_CHECKING:
+    from .models import BaseModel, PerplexityModel, BatchResults
+    from .chains import execute_chain, execute_chain_async, execute_chain_stream, execute_graph, map_step
+    from .executors import execution, configure_executors
+    from .tools import AITools
+    from .transport import HTTPTransport
+    from .cache import ResponseCache
+    from .ratelimit import RateLimiter, RetryPolicy, get_rate_limiter
+    from .metrics import MetricsAggregator, add_hook, remove_hook
+    from .batch import run_jsonl_batch
+    from .jobqueue import JobQueue, run_worker
+    from .checkpoint import CheckpointStore
+    from .server import OrchaServer
+    from .session import ChatSession
+    from .semantic_cache import SemanticCache
+    from .singleflight import SingleFlight
+    from .hedging import HedgePolicy
+    from .scheduler import RequestScheduler, request_context
+    from .tokens import estimate_tokens, estimate_message_tokens
+    from .errors import OrchaError, APIRequestError, DeadlineExceeded, ErrorResponse
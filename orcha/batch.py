@@ -0,0 +1,148 @@
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def completed_records(output_path: str) -> int:
+    """
+    Count the complete records in a JSONL output file.
+    A trailing partial line left by a killed run is truncated away.
+    """
+    if not os.path.exists(output_path):
+        return 0
+
+    count = 0
+    good_size = 0
+    with open(output_path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            good_size += len(line)
+            count += 1
+
+    if good_size != os.path.getsize(output_path):
+        with open(output_path, 'r+b') as f:
+            f.truncate(good_size)
+    return count
+
+
+def _mark(bitmap: bytearray, index: int):
+    byte = index >> 3
+    if byte >= len(bitmap):
+        bitmap.extend(bytes(byte + 1 - len(bitmap)))
+    bitmap[byte] |= 1 << (index & 7)
+
+
+def _marked(bitmap: bytearray, index: int) -> bool:
+    byte = index >> 3
+    return byte < len(bitmap) and bool(bitmap[byte] & (1 << (index & 7)))
+
+
+def finished_records(output_path: str, retry_errors: bool = True) -> Tuple[bytearray, int]:
+    """
+    Find the records an earlier run already finished, as a bitmap of
+    indexes and a count. With retry_errors, records that ended in an error
+    don't count and their lines are removed from the file so the retried
+    result replaces them.
+    """
+    completed_records(output_path)  # Drop a partial trailing line
+    done = bytearray()
+    count = 0
+    if not os.path.exists(output_path):
+        return done, count
+
+    errors = False
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            entry = json.loads(line)
+            if retry_errors and "error" in entry:
+                errors = True
+                continue
+            _mark(done, entry["index"])
+            count += 1
+
+    if errors:
+        temp_path = f"{output_path}.{os.getpid()}.tmp"
+        with open(output_path, 'r', encoding='utf-8') as f, open(temp_path, 'w', encoding='utf-8') as out:
+            for line in f:
+                if "error" not in json.loads(line):
+                    out.write(line)
+        os.replace(temp_path, output_path)
+    return done, count
+
+
+def run_jsonl_batch(input_path: str,
+                    output_path: str,
+                    process: Callable[[Any], Any],
+                    workers: int = 4,
+                    field: str = "input",
+                    resume: bool = True,
+                    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                    retry_errors: bool = True) -> Dict[str, Any]:
+    """
+    Stream a JSONL file through process() with a pool of workers.
+
+    Each non-blank input line is a JSON object (its `field` value is passed to
+    process) or a bare JSON value. One result line is written per input, in
+    input order: {"index", "input", "output"} or {"index", "input", "error"}.
+    The output is flushed after every line and doubles as the checkpoint:
+    with resume set, records already in the output file are skipped. Records
+    that failed are run again unless retry_errors is off; their results are
+    appended after the records that were already done.
+
+    Only about 2 * workers records are held in memory at a time, whatever
+    the input size.
+
+    Returns:
+        Counts of processed, failed and skipped records, and the elapsed time.
+    """
+    done, skip = finished_records(output_path, retry_errors) if resume else (bytearray(), 0)
+    stats = {"processed": 0, "errors": 0, "skipped": skip, "elapsed": 0.0}
+    start = time.perf_counter()
+    window = deque()
+
+    def run(line: str):
+        value = line.strip()
+        try:
+            record = json.loads(line)
+            value = record.get(field) if isinstance(record, dict) else record
+            return value, process(value), None
+        except Exception as e:
+            return value, None, f"{type(e).__name__}: {e}"
+
+    def write_next(out):
+        index, future = window.popleft()
+        value, result, error = future.result()
+        if error is None:
+            entry = {"index": index, "input": value, "output": result}
+        else:
+            entry = {"index": index, "input": value, "error": error}
+            stats["errors"] += 1
+        out.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        out.flush()
+        stats["processed"] += 1
+        if progress:
+            stats["elapsed"] = time.perf_counter() - start
+            progress(stats)
+
+    with open(input_path, 'r', encoding='utf-8') as source, \
+            open(output_path, 'a' if resume else 'w', encoding='utf-8') as out, \
+            ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        index = 0
+        for line in source:
+            if not line.strip():
+                continue
+            if not _marked(done, index):
+                window.append((index, pool.submit(run, line)))
+                if len(window) >= 2 * max(1, workers):
+                    write_next(out)
+            index += 1
+
+        while window:
+            write_next(out)
+
+    stats["elapsed"] = time.perf_counter() - start
+    return stats
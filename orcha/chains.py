@@ -1,28 +1,493 @@
-from typing import List, Union, Callable, Any
+import inspect
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from functools import partial
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Union, Callable, Any
 
-def execute_chain(chain_steps: List[Union[dict, Callable]], initial_input: Any = None) -> Any:
+from . import metrics
+from .errors import ErrorResponse
+from .executors import INLINE, execution_class, pool_size, submit
+from .scheduler import with_request_context
+
+if TYPE_CHECKING:
+    from .checkpoint import CheckpointStore
+
+
+def _run_dict_step(step: dict, data: Any) -> Any:
+    """Run a dict step ('name' and 'params'). Registered handlers are not implemented yet."""
+    # For now, just mock a dict step response:
+    name = step.get("name", "unknown")
+    params = step.get("params", {})
+    return f"Executed step '{name}' with params {params} and input {data}"
+
+
+def map_step(steps: Union[List[Union[dict, Callable]], dict, Callable],
+             max_concurrency: int = 4,
+             reduce: Union[dict, Callable, None] = None,
+             name: Optional[str] = None,
+             stream_reduce: bool = False) -> dict:
+    """
+    Build a map step that runs steps as a sub-chain on every element of its
+    input list. The same step can be written as a dict in YAML:
+
+        - map:
+            - name: summarize
+          max_concurrency: 4
+          reduce:
+            name: combine
+
+    reduce receives the list of results. With stream_reduce, an inline
+    callable reduce instead gets a one-shot iterator of results in input
+    order, consuming them while later elements are still running.
+    """
+    step = {"map": steps, "max_concurrency": max_concurrency}
+    if reduce is not None:
+        step["reduce"] = reduce
+    if stream_reduce:
+        step["stream_reduce"] = True
+    if name:
+        step["name"] = name
+    return step
+
+
+def _iter_mapped(sub_steps: List[Union[dict, Callable]], items: Iterable[Any], max_concurrency: int) -> Iterator[Any]:
+    """Run the sub-chain on each item concurrently, yielding results in input order as they finish"""
+    window = deque()
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        try:
+            for item in items:
+                window.append(pool.submit(with_request_context(execute_chain), sub_steps, item))
+                # Keep the pool busy, handing on finished results without waiting for the rest
+                while window and (window[0].done() or len(window) >= 2 * max_concurrency):
+                    yield window.popleft().result()
+            while window:
+                yield window.popleft().result()
+        finally:
+            for future in window:
+                future.cancel()
+
+
+def _run_map_step(step: dict, data: Any) -> Any:
+    """Run a map step: the sub-chain on each element of data, then the optional reduce step"""
+    sub_steps = step["map"]
+    if not isinstance(sub_steps, list):
+        sub_steps = [sub_steps]
+    if isinstance(data, (str, bytes, dict)) or not isinstance(data, Iterable):
+        raise TypeError(f"A map step needs a list input, got {type(data).__name__}")
+
+    results = _iter_mapped(sub_steps, data, max(1, int(step.get("max_concurrency", 4))))
+    reduce = step.get("reduce")
+    if reduce is None:
+        return list(results)
+    if step.get("stream_reduce") and callable(reduce) and execution_class(reduce) == INLINE:
+        # An inline reduce consumes results while later elements are still running
+        return reduce(results)
+    return _execute_step(reduce, list(results))
+
+
+def _run_step(step: Union[dict, Callable], data: Any) -> Any:
+    """Run a single chain step on data"""
+    if callable(step):
+        return step(data)  # Pass data to user function
+    elif isinstance(step, dict):
+        if "map" in step:
+            return _run_map_step(step, data)
+        return _run_dict_step(step, data)
+    else:
+        raise TypeError(f"Unsupported chain step type: {type(step)}")
+
+
+def _execute_step(step: Union[dict, Callable], data: Any, runner: Callable = _run_step) -> Any:
+    """Run a step with runner on the thread or process pool its execution class asks for"""
+    kind = execution_class(step)
+    if kind == INLINE:
+        return runner(step, data)
+    return submit(kind, partial(runner, step), data).result()
+
+
+def _step_name(step: Union[dict, Callable]) -> str:
+    """Name used for a step in instrumentation events"""
+    if isinstance(step, dict):
+        return str(step.get("id") or step.get("name") or ("map" if "map" in step else "unknown"))
+    return getattr(step, "__name__", type(step).__name__)
+
+
+def _emit_step(chain: str, step: Union[dict, Callable], index: Any, start: float, status: str,
+               queued_at: Optional[float] = None):
+    """Emit a "step" instrumentation event"""
+    event = {
+        "type": "step",
+        "chain": chain,
+        "step": _step_name(step),
+        "index": index,
+        "wall_time": time.perf_counter() - start,
+        "status": status,
+    }
+    if queued_at is not None:
+        event["queue_time"] = start - queued_at
+    metrics.emit(event)
+
+
+def _run_timed(step: Union[dict, Callable], data: Any, index: Any, chain: str,
+               runner: Callable = _run_step, queued_at: Optional[float] = None) -> Any:
+    """Run a step with runner, emitting a step event when hooks are registered"""
+    if not metrics.has_hooks():
+        return runner(step, data)
+    start = time.perf_counter()
+    status = "error"
+    try:
+        result = runner(step, data)
+        status = "ok"
+        return result
+    finally:
+        _emit_step(chain, step, index, start, status, queued_at)
+
+
+def execute_chain(chain_steps: List[Union[dict, Callable]], initial_input: Any = None,
+                  checkpoint: Optional["CheckpointStore"] = None) -> Any:
     """
     Executes a sequence of steps in order.
     Each step can be:
       - dict: with keys 'name' and params, which should be handled by registered handlers (not implemented yet)
       - callable: a user-defined function that takes input and returns output
-    
+      - map: a dict with a 'map' sub-chain that runs on every element of a
+        list input (see map_step)
+
+    Steps run inline unless they declare another execution class with the
+    @execution("thread" | "process") decorator or an 'execution' key, in
+    which case they run on a shared thread or process pool.
+
+    A step may return a generator, such as model.ask_stream(text); the next
+    step receives it as-is and can consume the stream incrementally.
+
+    With a checkpoint store, each step's output is saved under a hash of the
+    step and its input. A re-run loads the outputs of unchanged steps instead
+    of executing them and resumes at the first step whose key changed.
+    Steps capturing objects with no stable identity always run, and outputs
+    of steps during which a model call failed are not saved.
+
     Args:
         chain_steps: List of steps as dicts or callables.
         initial_input: Data passed to the first step.
+        checkpoint: Optional CheckpointStore for step outputs.
+
+    Returns:
+        The output of the last step.
+    """
+    data = initial_input
+    for index, step in enumerate(chain_steps):
+        key = checkpoint.step_key(step, data) if checkpoint is not None else None
+        if key is None:
+            data = _run_timed(step, data, index, "chain", _execute_step)
+            continue
         
+        found, output = checkpoint.get(key)
+        if found:
+            if metrics.has_hooks():
+                _emit_step("chain", step, index, time.perf_counter(), "checkpoint")
+            data = output
+        else:
+            from .checkpoint import track_failures
+            with track_failures() as failures:
+                data = _run_timed(step, data, index, "chain", _execute_step)
+            # A step whose model call failed returned an error string, not a result worth keeping
+            if not failures and not isinstance(data, ErrorResponse):
+                checkpoint.put(key, data)
+    return data
+
+
+async def execute_chain_async(chain_steps: List[Union[dict, Callable]], initial_input: Any = None) -> Any:
+    """
+    Async version of execute_chain.
+    Callable steps may be plain functions or coroutine functions (e.g. ones
+    calling model.aask); any awaitable a step returns is awaited before the
+    next step runs.
+
+    Args:
+        chain_steps: List of steps as dicts, callables or async callables.
+        initial_input: Data passed to the first step.
+
     Returns:
         The output of the last step.
     """
+    import asyncio
+
     data = initial_input
+    for index, step in enumerate(chain_steps):
+        start = time.perf_counter()
+        status = "error"
+        try:
+            kind = execution_class(step)
+            if kind == INLINE:
+                data = _run_step(step, data)
+            else:
+                data = await asyncio.wrap_future(submit(kind, partial(_run_step, step), data))
+            if inspect.isawaitable(data):
+                data = await data
+            status = "ok"
+        finally:
+            if metrics.has_hooks():
+                _emit_step("chain_async", step, index, start, status)
+    return data
+
+
+_END = object()
+
+
+class _StageError:
+    """Carries an exception from a pipeline stage to the consumer"""
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+def execute_chain_stream(chain_steps: List[Union[dict, Callable]],
+                         inputs: Iterable[Any],
+                         buffer_size: int = 16) -> Iterator[Any]:
+    """
+    Runs a chain over many inputs as a pipeline, yielding results lazily.
+    Every step runs in its own thread and hands items to the next step through
+    a bounded queue, so item N+1 can be in step 1 while item N is in step 2.
+    Inputs are pulled lazily and at most buffer_size items wait between two
+    steps, so memory stays constant however long the input is.
+
+    A thread or process step keeps a bounded window of items in flight on
+    its pool and emits results in input order, so a CPU-heavy stage can use
+    every core while I/O stages overlap with it.
+
+    Args:
+        chain_steps: List of steps as dicts or callables.
+        inputs: Iterable of initial inputs, one chain run per item.
+        buffer_size: Maximum number of items queued between two steps.
+
+    Returns:
+        A generator of chain outputs, in input order. An exception raised by a
+        step is re-raised by the generator.
+    """
     for step in chain_steps:
-        if callable(step):
-            data = step(data)  # Pass data to user function
-        elif isinstance(step, dict):
-            # For now, just mock a dict step response:
-            name = step.get("name", "unknown")
-            params = step.get("params", {})
-            data = f"Executed step '{name}' with params {params} and input {data}"
-        else:
+        if not callable(step) and not isinstance(step, dict):
             raise TypeError(f"Unsupported chain step type: {type(step)}")
-    return data
+
+    stop = threading.Event()
+    queues = [queue.Queue(maxsize=max(1, buffer_size)) for _ in range(len(chain_steps) + 1)]
+
+    def put(q: queue.Queue, item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(q: queue.Queue) -> Any:
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def feed(out_q: queue.Queue):
+        try:
+            for item in inputs:
+                if not put(out_q, item):
+                    return
+        except Exception as e:
+            put(out_q, _StageError(e))
+            return
+        put(out_q, _END)
+
+    def pooled_stage(step: Union[dict, Callable], index: int, in_q: queue.Queue, out_q: queue.Queue, kind: str):
+        window = deque()
+        limit = 2 * pool_size(kind)
+        finished = False
+        while not stop.is_set():
+            # Hand on finished items in order; wait for the oldest when the window is full or input ended
+            while window and (window[0][0].done() or len(window) >= limit or finished):
+                future, started = window.popleft()
+                try:
+                    result = future.result()
+                except Exception as e:
+                    if metrics.has_hooks():
+                        _emit_step("stream", step, index, started, "error")
+                    put(out_q, _StageError(e))
+                    return
+                if metrics.has_hooks():
+                    _emit_step("stream", step, index, started, "ok")
+                if not put(out_q, result):
+                    return
+            if finished:
+                put(out_q, item)
+                return
+
+            try:
+                item = in_q.get(timeout=0.01 if window else 0.1)
+            except queue.Empty:
+                continue
+            if item is _END or isinstance(item, _StageError):
+                finished = True
+                continue
+            window.append((submit(kind, partial(_run_step, step), item), time.perf_counter()))
+
+    def stage(step: Union[dict, Callable], index: int, in_q: queue.Queue, out_q: queue.Queue):
+        kind = execution_class(step)
+        if kind != INLINE:
+            pooled_stage(step, index, in_q, out_q, kind)
+            return
+        while True:
+            item = get(in_q)
+            if item is _END or isinstance(item, _StageError):
+                put(out_q, item)
+                return
+            try:
+                result = _run_timed(step, item, index, "stream")
+            except Exception as e:
+                put(out_q, _StageError(e))
+                return
+            if not put(out_q, result):
+                return
+
+    def results() -> Iterator[Any]:
+        workers = [threading.Thread(target=feed, args=(queues[0],), daemon=True)]
+        for index, step in enumerate(chain_steps):
+            workers.append(threading.Thread(target=stage, args=(step, index, queues[index], queues[index + 1]), daemon=True))
+        for worker in workers:
+            worker.start()
+
+        try:
+            while True:
+                item = queues[-1].get()
+                if item is _END:
+                    return
+                if isinstance(item, _StageError):
+                    raise item.error
+                yield item
+        finally:
+            # Unblocks every stage if the consumer stops early or a step failed
+            stop.set()
+
+    return results()
+
+
+def _graph_order(graph_steps: List[dict]) -> Dict[str, dict]:
+    """Index graph steps by id, checking for duplicates, unknown inputs and cycles"""
+    steps = {}
+    for step in graph_steps:
+        if not isinstance(step, dict) or "id" not in step:
+            raise TypeError("Graph steps must be dicts with an 'id' key")
+        if step["id"] in steps:
+            raise ValueError(f"Duplicate graph step id: '{step['id']}'")
+        steps[step["id"]] = step
+
+    for step_id, step in steps.items():
+        for input_id in step.get("inputs", []):
+            if input_id not in steps:
+                raise ValueError(f"Step '{step_id}' depends on unknown step '{input_id}'")
+
+    # Kahn's algorithm: anything left unvisited is part of a cycle
+    remaining = {step_id: len(step.get("inputs", [])) for step_id, step in steps.items()}
+    ready = [step_id for step_id, count in remaining.items() if count == 0]
+    visited = 0
+    while ready:
+        current = ready.pop()
+        visited += 1
+        for step_id, step in steps.items():
+            if current in step.get("inputs", []):
+                remaining[step_id] -= 1
+                if remaining[step_id] == 0:
+                    ready.append(step_id)
+    if visited != len(steps):
+        raise ValueError("Graph contains a cycle")
+
+    return steps
+
+
+def _run_graph_step(step: dict, data: Any) -> Any:
+    """Run one graph step: its 'run' callable, or a dict step"""
+    run = step.get("run")
+    if run is not None:
+        if not callable(run):
+            raise TypeError(f"Step '{step['id']}' has a non-callable 'run'")
+        return run(data)
+    if "map" in step:
+        return _run_map_step(step, data)
+    return _run_dict_step(step, data)
+
+
+def _execute_graph_step(step: dict, data: Any) -> Any:
+    """Run a graph step on the pool its execution class asks for"""
+    return _execute_step(step, data, _run_graph_step)
+
+
+def execute_graph(graph_steps: List[dict],
+                  initial_input: Any = None,
+                  max_parallelism: int = 4,
+                  return_all: bool = False) -> Any:
+    """
+    Executes steps as a dependency graph, running independent steps concurrently.
+    Each step is a dict with:
+      - id: unique step name
+      - inputs: ids of the steps whose outputs it needs (omit to receive initial_input)
+      - run: a callable taking the input, or 'name'/'params' like a dict chain step
+
+    A step with one input receives that step's output; a step with several
+    receives a dict of {input_id: output}. A step starts as soon as all of its
+    inputs are ready, so total time follows the critical path.
+
+    Args:
+        graph_steps: List of step dicts.
+        initial_input: Data passed to steps without inputs.
+        max_parallelism: Maximum number of steps running at once.
+        return_all: Return a dict of every step's output instead of just the last step's.
+
+    Returns:
+        The output of the last step in graph_steps, or all outputs when return_all is set.
+    """
+    steps = _graph_order(graph_steps)
+    if not steps:
+        return {} if return_all else initial_input
+
+    outputs = {}
+    waiting = {step_id: set(step.get("inputs", [])) for step_id, step in steps.items()}
+
+    def step_input(step: dict) -> Any:
+        inputs = step.get("inputs", [])
+        if not inputs:
+            return initial_input
+        if len(inputs) == 1:
+            return outputs[inputs[0]]
+        return {input_id: outputs[input_id] for input_id in inputs}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_parallelism)) as pool:
+        running = {}
+
+        def submit_ready():
+            for step_id in [step_id for step_id, deps in waiting.items() if not deps]:
+                del waiting[step_id]
+                step = steps[step_id]
+                future = pool.submit(with_request_context(_run_timed), step, step_input(step), step_id, "graph",
+                                     _execute_graph_step, time.perf_counter())
+                running[future] = step_id
+
+        submit_ready()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step_id = running.pop(future)
+                try:
+                    outputs[step_id] = future.result()
+                except Exception:
+                    for pending in running:
+                        pending.cancel()
+                    raise
+                for deps in waiting.values():
+                    deps.discard(step_id)
+            submit_ready()
+
+    if return_all:
+        return outputs
+    return outputs[graph_steps[-1]["id"]]
@@ -0,0 +1,261 @@
+import contextvars
+import functools
+import hashlib
+import os
+import pickle
+import threading
+import time
+import types
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+
+
+class _Unidentifiable(Exception):
+    """A step captures a value that has no stable identity"""
+
+
+# Errors from model calls made by the step currently being checkpointed
+_step_failures: contextvars.ContextVar = contextvars.ContextVar("orcha_step_failures", default=None)
+
+
+def record_failure(error: Exception):
+    """Note that a model call failed, so the running step's output is not checkpointed"""
+    failures = _step_failures.get()
+    if failures is not None:
+        failures.append(error)
+
+
+@contextmanager
+def track_failures():
+    """
+    Collect the model call failures recorded while the block runs, including
+    ones on pool threads that inherit the context. They are passed on to an
+    enclosing block as well.
+    """
+    outer = _step_failures.get()
+    failures = []
+    token = _step_failures.set(failures)
+    try:
+        yield failures
+    finally:
+        _step_failures.reset(token)
+        if outer is not None:
+            outer.extend(failures)
+
+
+def step_identity(step: Union[dict, Callable]) -> Optional[str]:
+    """
+    Stable description of a step for checkpoint keys.
+
+    Dict steps are identified by their content; callables by module, name and
+    a hash of their code, so editing a function invalidates its checkpoints.
+    Values a callable uses are part of its identity too: functools.partial
+    arguments, default arguments, closure cells, the module globals its code
+    refers to and the object a method is bound to. Callables inside dict steps are described the same way.
+
+    Returns None when part of the step cannot be identified across runs (an
+    object that cannot be pickled and has no checkpoint_identity() method);
+    such steps are not checkpointed.
+    """
+    try:
+        return ("dict:" if isinstance(step, dict) else "callable:") + _describe(step, set())
+    except _Unidentifiable:
+        return None
+
+
+def _code_hash(code) -> str:
+    """Hash of a code object, including nested code such as lambdas and comprehensions"""
+    digest = hashlib.sha256(code.co_code)
+    digest.update(repr(code.co_names).encode("utf-8"))
+    for const in code.co_consts:
+        if hasattr(const, "co_code"):
+            digest.update(_code_hash(const).encode("utf-8"))
+        else:
+            digest.update(repr(const).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _global_names(code) -> Set[str]:
+    """Names a code object and the code nested in it may look up as globals"""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if hasattr(const, "co_code"):
+            names |= _global_names(const)
+    return names
+
+
+def _describe(value: Any, seen: Set[int]) -> str:
+    if value is None or isinstance(value, (str, bytes, int, float, bool)):
+        return repr(value)
+    if isinstance(value, functools.partial):
+        return (f"partial({_describe(value.func, seen)}, {_describe(value.args, seen)}, "
+                f"{_describe(value.keywords, seen)})")
+    if isinstance(value, dict):
+        items = sorted(f"{_describe(key, seen)}: {_describe(item, seen)}" for key, item in value.items())
+        return "{" + ", ".join(items) + "}"
+    if isinstance(value, (list, tuple, set, frozenset)):
+        parts = [_describe(item, seen) for item in value]
+        if isinstance(value, (set, frozenset)):
+            parts.sort()
+        return f"{type(value).__name__}({', '.join(parts)})"
+    if isinstance(value, (type, types.ModuleType)):
+        return f"{getattr(value, '__module__', '')}.{getattr(value, '__qualname__', value.__name__)}"
+    if hasattr(value, "checkpoint_identity"):
+        return f"{type(value).__qualname__}({value.checkpoint_identity()})"
+
+    func = getattr(value, "__func__", value)
+    code = getattr(func, "__code__", None)
+    if code is not None:
+        name = f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', type(func).__name__)}"
+        if id(func) in seen:
+            # A recursive closure; its code is already part of the identity
+            return name
+        seen.add(id(func))
+        cells = []
+        for cell in func.__closure__ or ():
+            try:
+                cells.append(cell.cell_contents)
+            except ValueError:
+                cells.append(None)  # Cell not assigned yet
+        module_globals = getattr(func, "__globals__", {})
+        used = {key: module_globals[key] for key in sorted(_global_names(code)) if key in module_globals}
+        parts = [name, _code_hash(code), _describe(func.__defaults__ or (), seen),
+                 _describe(func.__kwdefaults__ or {}, seen), _describe(tuple(cells), seen),
+                 _describe(used, seen)]
+        if func is not value:
+            parts.append(_describe(value.__self__, seen))
+        return f"function({', '.join(parts)})"
+
+    # Builtins, callable objects and captured data: identified by their pickled content
+    try:
+        raw = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        raise _Unidentifiable(type(value).__qualname__)
+    call = getattr(type(value), "__call__", None)
+    code_part = f":{_code_hash(call.__code__)}" if hasattr(call, "__code__") else ""
+    return f"{type(value).__qualname__}{code_part}:{hashlib.sha256(raw).hexdigest()}"
+
+
+def data_digest(data: Any) -> str:
+    """Hash of a step input; falls back to repr() for values that cannot be pickled"""
+    try:
+        raw = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        raw = repr(data).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+class CheckpointStore:
+    """
+    Content-addressed, on-disk store of chain step outputs.
+
+    Each output is pickled to its own file named by a hash of the step
+    identity and the step's input. When the store grows past max_bytes the
+    least recently used entries are deleted.
+    """
+
+    def __init__(self, directory: str = ".orcha/checkpoints", max_bytes: int = 512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(entry["size"] for entry in self.entries())
+
+    def step_key(self, step: Union[dict, Callable], data: Any) -> Optional[str]:
+        """Key for running step on data, or None if the step cannot be checkpointed"""
+        identity = step_identity(step)
+        if identity is None:
+            return None
+        raw = identity + "\n" + data_digest(data)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".pkl")
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Return (found, value) for key"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            self.misses += 1
+            return False, None
+        os.utime(path)  # Mark as recently used for eviction
+        self.hits += 1
+        return True, value
+
+    def put(self, key: str, value: Any) -> bool:
+        """Store value under key. Returns False if the value cannot be pickled."""
+        try:
+            raw = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return False
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(raw)
+        previous = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(temp_path, path)
+
+        with self._lock:
+            self._size += len(raw) - previous
+            if self._size > self.max_bytes:
+                self.evict()
+        return True
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Every stored entry with its size and last use time, oldest first"""
+        found = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".pkl"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                found.append({"key": name[:-4], "path": path, "size": stat.st_size, "used": stat.st_mtime})
+        found.sort(key=lambda entry: entry["used"])
+        return found
+
+    def evict(self, max_bytes: int = None) -> int:
+        """Delete least recently used entries until the store fits max_bytes; returns the number removed"""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(entry["size"] for entry in entries)
+        removed = 0
+        for entry in entries:
+            if total <= limit:
+                break
+            try:
+                os.remove(entry["path"])
+            except OSError:
+                continue
+            total -= entry["size"]
+            removed += 1
+        self._size = total
+        return removed
+
+    def clear(self) -> int:
+        """Delete every entry, returning the number removed"""
+        return self.evict(max_bytes=0)
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count, total size and hit/miss counters"""
+        entries = self.entries()
+        return {
+            "directory": os.path.abspath(self.directory),
+            "entries": len(entries),
+            "bytes": sum(entry["size"] for entry in entries),
+            "max_bytes": self.max_bytes,
+            "oldest": time.ctime(entries[0]["used"]) if entries else None,
+            "newest": time.ctime(entries[-1]["used"]) if entries else None,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
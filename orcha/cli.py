@@ -1,31 +1,129 @@
 import typer
-import yaml
 import os
 from pathlib import Path
 from typing import Optional
-from dotenv import load_dotenv
 
-from .models import PerplexityModel
-from .chains import execute_chain
-
-# Load environment variables
-load_dotenv()
+# Heavy modules (requests, yaml, dotenv, the model stack) are imported inside
+# the commands that need them so quick commands like `version` start fast.
 
 app = typer.Typer(help="🚀 Orcha - AI Orchestration Library")
 
 # Global model registry
 model_registry = {}
 
+# Connection pool, response cache and hedge policy shared by every model in the registry
+transport = None
+response_cache = None
+hedge_policy = None
+scheduler = None
+
+# Where the hedge policy keeps per-model latency between runs
+DEFAULT_LATENCY_PATH = ".orcha/latency.json"
+
+_env_loaded = False
+
+def load_env():
+    """Load environment variables from .env once"""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+def get_transport():
+    """Create the shared HTTP transport on first use"""
+    global transport
+    if transport is None:
+        from .transport import HTTPTransport
+        transport = HTTPTransport(
+            pool_size=int(os.getenv("ORCHA_POOL_SIZE", "10")),
+            connect_timeout=float(os.getenv("ORCHA_CONNECT_TIMEOUT", "5")),
+            read_timeout=float(os.getenv("ORCHA_READ_TIMEOUT", "60"))
+        )
+    return transport
+
+def get_response_cache():
+    """Create the response cache when ORCHA_CACHE_PATH is set"""
+    global response_cache
+    cache_path = os.getenv("ORCHA_CACHE_PATH")
+    if response_cache is None and cache_path:
+        from .cache import ResponseCache
+        response_cache = ResponseCache(
+            path=os.path.expanduser(cache_path),
+            ttl=float(os.getenv("ORCHA_CACHE_TTL", "86400"))
+        )
+    return response_cache
+
+def get_hedge_policy():
+    """Create the hedge policy when ORCHA_HEDGE_PERCENTILE is set"""
+    global hedge_policy
+    percentile = os.getenv("ORCHA_HEDGE_PERCENTILE")
+    if hedge_policy is None and percentile:
+        import atexit
+        from .hedging import HedgePolicy
+        hedge_policy = HedgePolicy(
+            percentile=float(percentile),
+            fallback_model=os.getenv("ORCHA_HEDGE_FALLBACK_MODEL") or None,
+            max_extra_rate=float(os.getenv("ORCHA_HEDGE_MAX_EXTRA", "0.1"))
+        )
+        # Start from the latencies seen by earlier runs and save them for the next one
+        latency_path = os.getenv("ORCHA_LATENCY_PATH", DEFAULT_LATENCY_PATH)
+        hedge_policy.load(latency_path)
+        atexit.register(hedge_policy.save, latency_path)
+    return hedge_policy
+
+def get_scheduler():
+    """Create the request scheduler every CLI model shares, sized by ORCHA_MAX_IN_FLIGHT"""
+    global scheduler
+    if scheduler is None:
+        from .scheduler import RequestScheduler
+        scheduler = RequestScheduler(max_in_flight=int(os.getenv("ORCHA_MAX_IN_FLIGHT", "8")))
+    return scheduler
+
+def reserve_in_flight(concurrency: int):
+    """Let the shared scheduler admit a command's own concurrency, unless ORCHA_MAX_IN_FLIGHT pins it"""
+    if not os.getenv("ORCHA_MAX_IN_FLIGHT"):
+        shared = get_scheduler()
+        if concurrency > shared.max_in_flight:
+            shared.resize(concurrency)
+
+def load_chain_file(file: str) -> dict:
+    """Parse a YAML chain file"""
+    import yaml
+    with open(file, 'r') as f:
+        return yaml.safe_load(f) or {}
+
+def get_checkpoint_store(directory: str):
+    """Open a step checkpoint store, sized by ORCHA_CHECKPOINT_MAX_MB"""
+    from .checkpoint import CheckpointStore
+    max_mb = float(os.getenv("ORCHA_CHECKPOINT_MAX_MB", "512"))
+    return CheckpointStore(directory, max_bytes=int(max_mb * 1024 * 1024))
+
 def get_or_create_model(model_name: str = "default"):
     """Get or create a model instance with real API key"""
     if model_name not in model_registry:
+        load_env()
+        from .models import PerplexityModel
+        from .ratelimit import get_rate_limiter
+        
         api_key = os.getenv("PERPLEXITY_API_KEY")
         if not api_key:
             typer.echo("❌ Error: PERPLEXITY_API_KEY not found in environment variables.", err=True)
             typer.echo("💡 Add your API key to .env file: PERPLEXITY_API_KEY=pplx-your-key-here", err=True)
             raise typer.Exit(1)
         
-        model_registry[model_name] = PerplexityModel(api_key=api_key, model="sonar-pro")
+        # Every model shares the limiter for the API key
+        rate_limiter = get_rate_limiter(
+            api_key,
+            requests_per_minute=float(os.getenv("ORCHA_REQUESTS_PER_MINUTE", "0")) or None,
+            tokens_per_minute=float(os.getenv("ORCHA_TOKENS_PER_MINUTE", "0")) or None,
+            adaptive=os.getenv("ORCHA_ADAPTIVE_RATE", "").lower() in ("1", "true", "yes")
+        )
+        
+        model_registry[model_name] = PerplexityModel(api_key=api_key, model="sonar-pro",
+                                                    transport=get_transport(), cache=get_response_cache(),
+                                                    rate_limiter=rate_limiter, hedge=get_hedge_policy(),
+                                                    scheduler=get_scheduler())
         typer.echo(f"✅ Created model '{model_name}' with API key")
     
     return model_registry[model_name]
@@ -40,12 +138,30 @@ def version():
     typer.echo("\n📚 Available Commands:")
     typer.echo("  • prompt     - Send quick prompts to AI")
     typer.echo("  • run-chain  - Execute chains from YAML files")
+    typer.echo("  • batch      - Process JSONL files concurrently")
+    typer.echo("  • enqueue    - Queue JSONL records for workers")
+    typer.echo("  • worker     - Run queued jobs (any number of hosts)")
+    typer.echo("  • serve      - Run a local server with warm models")
+    typer.echo("  • chat       - Interactive multi-turn chat")
     typer.echo("  • test       - Test API connection")
     typer.echo("  • models     - List available model types")
 
 @app.command()
-def run_chain(file: str, model_name: str = typer.Option("default", help="Model to use")):
+def run_chain(
+    file: str,
+    model_name: str = typer.Option("default", help="Model to use"),
+    max_parallelism: Optional[int] = typer.Option(None, help="Max steps running at once for 'graph' chains"),
+    metrics: bool = typer.Option(False, "--metrics", help="Print per-step and per-request timing breakdown"),
+    metrics_format: str = typer.Option("text", help="Metrics output format: text, json or prometheus"),
+    checkpoint_dir: Optional[str] = typer.Option(None, help="Save step outputs here and skip unchanged steps on re-runs")
+):
     """Run a chain from a YAML file"""
+    from .metrics import MetricsAggregator, add_hook, remove_hook
+    
+    aggregator = None
+    if metrics:
+        aggregator = add_hook(MetricsAggregator())
+    
     try:
         # Check if file exists
         file_path = Path(file)
@@ -56,11 +172,11 @@ def run_chain(file: str, model_name: str = typer.Option("default", help="Model t
         typer.echo(f"📁 Loading chain from {file}...")
         
         # Load YAML file
-        with open(file, 'r') as f:
-            chain_data = yaml.safe_load(f)
+        chain_data = load_chain_file(file)
         
-        # Get steps and initial input
-        steps = chain_data.get('steps', [])
+        # Get steps and initial input; a 'graph' section declares steps with inputs
+        graph = chain_data.get('graph', [])
+        steps = graph or chain_data.get('steps', [])
         initial_input = chain_data.get('initial_input')
         
         if not steps:
@@ -73,8 +189,16 @@ def run_chain(file: str, model_name: str = typer.Option("default", help="Model t
         model = get_or_create_model(model_name)
         
         # Execute chain
-        typer.echo("🚀 Executing chain...")
-        result = model.execute_chain(steps, initial_input)
+        if graph:
+            parallelism = max_parallelism or chain_data.get('max_parallelism', 4)
+            typer.echo(f"🚀 Executing graph chain (max parallelism: {parallelism})...")
+            result = model.execute_graph(graph, initial_input, max_parallelism=parallelism)
+        else:
+            store = get_checkpoint_store(checkpoint_dir) if checkpoint_dir else None
+            typer.echo("🚀 Executing chain...")
+            result = model.execute_chain(steps, initial_input, checkpoint=store)
+            if store:
+                typer.echo(f"💾 Checkpoints: {store.hits} steps reused, {store.misses} executed")
         
         typer.echo("\n" + "="*50)
         typer.echo("📊 CHAIN EXECUTION RESULT")
@@ -86,6 +210,17 @@ def run_chain(file: str, model_name: str = typer.Option("default", help="Model t
     except Exception as e:
         typer.echo(f"❌ Error: {str(e)}", err=True)
         raise typer.Exit(1)
+    
+    finally:
+        if aggregator:
+            remove_hook(aggregator)
+            typer.echo("\n📈 METRICS")
+            if metrics_format == "json":
+                typer.echo(aggregator.to_json())
+            elif metrics_format == "prometheus":
+                typer.echo(aggregator.to_prometheus(), nl=False)
+            else:
+                typer.echo(aggregator.format_text())
 
 @app.command() 
 def prompt(
@@ -93,9 +228,13 @@ def prompt(
     model_name: str = typer.Option("default", help="Model to use"),
     personality: str = typer.Option("", help="Set chatbot personality"),
     sentiment: bool = typer.Option(False, help="Analyze sentiment"),
-    topic: bool = typer.Option(False, help="Classify topic")
+    topic: bool = typer.Option(False, help="Classify topic"),
+    stream: bool = typer.Option(False, help="Print the response as it is generated"),
+    raw: bool = typer.Option(False, help="Print only the reply, without the tools prefix")
 ):
     """Send a quick prompt to AI with optional tools"""
+    from .scheduler import request_context
+    
     try:
         # Get model instance
         model = get_or_create_model(model_name)
@@ -125,8 +264,25 @@ def prompt(
             model.tools.chatbot(personality=personality)
         
         # Send prompt
+        typer.echo(f"📏 Estimated input: ~{model.estimate_input_tokens(text)} tokens")
         typer.echo(f"💭 Sending prompt to AI...")
-        response = model.ask(text)
+        
+        if stream:
+            typer.echo("\n" + "="*50)
+            typer.echo("🤖 AI RESPONSE")
+            typer.echo("="*50)
+            with request_context(priority="interactive"):
+                for chunk in model.ask_stream(text):
+                    typer.echo(chunk, nl=False)
+            typer.echo("\n" + "="*50)
+            return
+        
+        with request_context(priority="interactive"):
+            response = model.ask(text, raw=raw)
+        
+        if raw:
+            typer.echo(response)
+            return
         
         typer.echo("\n" + "="*50)
         typer.echo("🤖 AI RESPONSE")
@@ -140,6 +296,222 @@ def prompt(
         typer.echo(f"❌ Full traceback: {traceback.format_exc()}")
         raise typer.Exit(1)
 
+@app.command()
+def chat(
+    model_name: str = typer.Option("default", help="Model to use"),
+    personality: str = typer.Option("helpful and friendly", help="Chatbot personality"),
+    max_context: int = typer.Option(3000, help="Token budget for system prompt and history"),
+    summarize: bool = typer.Option(False, help="Summarize old turns instead of dropping them")
+):
+    """Start an interactive multi-turn chat (empty line or 'exit' to quit)"""
+    from .scheduler import request_context
+    
+    try:
+        model = get_or_create_model(model_name)
+        model.tools.clear_tools()
+        model.tools.chatbot(personality=personality)
+        session = model.session(max_context_tokens=max_context, summarize=summarize)
+        
+        typer.echo(f"💬 Chatting with {model.model} (budget {max_context} tokens)")
+        typer.echo("="*50)
+        while True:
+            text = typer.prompt("🧑 You", default="", show_default=False)
+            if not text.strip() or text.strip().lower() in ("exit", "quit"):
+                break
+            with request_context(priority="interactive"):
+                reply = session.send(text)
+            stats = session.stats()
+            typer.echo(f"🤖 {reply}")
+            typer.echo(f"   (~{stats['last_prompt_tokens']} input tokens, {stats['history_messages']} messages in context)")
+        typer.echo("="*50)
+        typer.echo(f"👋 {session.turns} turns, {session.dropped_turns} messages dropped, {session.summaries} summaries")
+        
+    except Exception as e:
+        typer.echo(f"❌ Error: {str(e)}", err=True)
+
+@app.command()
+def batch(
+    input_file: str = typer.Argument(..., help="JSONL file of inputs"),
+    output_file: str = typer.Argument(..., help="JSONL file to write results to"),
+    chain: Optional[str] = typer.Option(None, help="YAML chain to run on each record instead of a prompt"),
+    template: str = typer.Option("{input}", help="Prompt template; {input} is replaced by the record's value"),
+    field: str = typer.Option("input", help="Record key holding the input value"),
+    workers: int = typer.Option(4, help="Number of concurrent workers"),
+    model_name: str = typer.Option("default", help="Model to use"),
+    restart: bool = typer.Option(False, help="Discard existing output instead of resuming"),
+    retry_errors: bool = typer.Option(True, help="When resuming, run records that failed again")
+):
+    """Process a JSONL file through a prompt or chain, resuming where a previous run stopped"""
+    from .batch import run_jsonl_batch
+    from .scheduler import request_context
+    
+    if not Path(input_file).exists():
+        typer.echo(f"❌ Error: File '{input_file}' not found", err=True)
+        raise typer.Exit(1)
+    
+    model = get_or_create_model(model_name)
+    
+    if chain:
+        chain_data = load_chain_file(chain)
+        graph = chain_data.get('graph', [])
+        steps = chain_data.get('steps', [])
+        parallelism = chain_data.get('max_parallelism', 4)
+        # Graph steps fan out, so each worker may have several requests in flight
+        reserve_in_flight(workers * (parallelism if graph else 1))
+        
+        def process(value):
+            if graph:
+                return model.execute_graph(graph, value, max_parallelism=parallelism)
+            return model.execute_chain(steps, value)
+        typer.echo(f"🔗 Running chain {chain} on each record with {workers} workers...")
+    else:
+        reserve_in_flight(workers)
+        
+        def process(value):
+            return model.ask(template.replace("{input}", str(value)), raise_errors=True)
+        typer.echo(f"💭 Sending each record to the model with {workers} workers...")
+    
+    def scheduled(value):
+        # Bulk traffic yields to interactive requests and shares fairly with other runs
+        with request_context(priority="batch", tenant=Path(input_file).name):
+            return process(value)
+    
+    def report(stats):
+        if stats["processed"] % 100 == 0:
+            rate = stats["processed"] / stats["elapsed"] if stats["elapsed"] else 0.0
+            typer.echo(f"   • {stats['processed']} done ({stats['errors']} errors, {rate:.1f}/s)")
+    
+    try:
+        stats = run_jsonl_batch(input_file, output_file, scheduled, workers=workers, field=field,
+                                resume=not restart, progress=report, retry_errors=retry_errors)
+    except (OSError, ValueError) as e:
+        typer.echo(f"❌ Error: {str(e)}", err=True)
+        raise typer.Exit(1)
+    
+    if stats["skipped"]:
+        typer.echo(f"⏩ Resumed after {stats['skipped']} completed records")
+    typer.echo(f"✅ Processed {stats['processed']} records in {stats['elapsed']:.1f}s "
+               f"({stats['errors']} errors) -> {output_file}")
+
+def get_job_queue(queue_path: Optional[str]):
+    """Open the job queue at queue_path, ORCHA_QUEUE_PATH or .orcha/jobs.db"""
+    from .jobqueue import JobQueue
+    path = queue_path or os.getenv("ORCHA_QUEUE_PATH", ".orcha/jobs.db")
+    return JobQueue(os.path.expanduser(path), lease_seconds=float(os.getenv("ORCHA_LEASE_SECONDS", "60")))
+
+@app.command()
+def enqueue(
+    input_file: str = typer.Argument(..., help="JSONL file of inputs"),
+    chain: Optional[str] = typer.Option(None, help="YAML chain to run on each record instead of a prompt"),
+    template: str = typer.Option("{input}", help="Prompt template; {input} is replaced by the record's value"),
+    field: str = typer.Option("input", help="Record key holding the input value"),
+    queue_path: Optional[str] = typer.Option(None, help="Job queue database (default: ORCHA_QUEUE_PATH or .orcha/jobs.db)"),
+    max_attempts: int = typer.Option(3, help="Attempts before a job is marked failed")
+):
+    """Add a job per JSONL record to the queue for 'orcha worker' processes"""
+    import json
+    
+    if not Path(input_file).exists():
+        typer.echo(f"❌ Error: File '{input_file}' not found", err=True)
+        raise typer.Exit(1)
+    
+    # The parsed chain travels with the job so workers don't need the YAML file
+    task = {"chain": load_chain_file(chain)} if chain else {"template": template}
+    # Jobs from one input file share capacity fairly with other files' jobs
+    task["tenant"] = Path(input_file).name
+    
+    def values():
+        with open(input_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record.get(field) if isinstance(record, dict) else record
+    
+    job_queue = get_job_queue(queue_path)
+    try:
+        ids = job_queue.enqueue_many(values(), task, max_attempts=max_attempts)
+    except ValueError as e:
+        typer.echo(f"❌ Error: {str(e)}", err=True)
+        raise typer.Exit(1)
+    typer.echo(f"📥 Enqueued {len(ids)} jobs in {job_queue.path}")
+
+@app.command()
+def worker(
+    queue_path: Optional[str] = typer.Option(None, help="Job queue database (default: ORCHA_QUEUE_PATH or .orcha/jobs.db)"),
+    concurrency: int = typer.Option(4, help="Jobs to run at once in this worker"),
+    model_name: str = typer.Option("default", help="Model to use"),
+    exit_when_empty: bool = typer.Option(False, help="Stop once no jobs are left instead of waiting for more")
+):
+    """Lease and run queued jobs; start one per core or host to scale out"""
+    import threading
+    from .jobqueue import run_worker, default_worker_id
+    from .scheduler import request_context
+    
+    job_queue = get_job_queue(queue_path)
+    model = get_or_create_model(model_name)
+    reserve_in_flight(concurrency)
+    
+    def process(job):
+        with request_context(priority="batch", tenant=job.task.get("tenant", "jobs")):
+            return run_job(job)
+    
+    def run_job(job):
+        chain_data = job.task.get("chain")
+        if chain_data is None:
+            return model.ask(job.task.get("template", "{input}").replace("{input}", str(job.input)), raise_errors=True)
+        graph = chain_data.get('graph', [])
+        if graph:
+            return model.execute_graph(graph, job.input, max_parallelism=chain_data.get('max_parallelism', 4))
+        return model.execute_chain(chain_data.get('steps', []), job.input)
+    
+    def report(stats):
+        done = stats["completed"] + stats["failed"]
+        if done % 100 == 0:
+            rate = done / stats["elapsed"] if stats["elapsed"] else 0.0
+            typer.echo(f"   • {stats['completed']} done, {stats['failed']} failed ({rate:.1f}/s)")
+    
+    worker_id = default_worker_id()
+    stop = threading.Event()
+    typer.echo(f"👷 Worker {worker_id} polling {job_queue.path} with {concurrency} slots...")
+    try:
+        stats = run_worker(job_queue, process, worker=worker_id, concurrency=concurrency,
+                           exit_when_empty=exit_when_empty, progress=report, stop=stop)
+    except KeyboardInterrupt:
+        # Unfinished jobs are picked up by another worker once their lease expires
+        stop.set()
+        typer.echo("\n🛑 Worker stopped")
+        return
+    typer.echo(f"✅ Worker finished: {stats['completed']} completed, {stats['failed']} failed, "
+               f"{stats['lost']} lost leases in {stats['elapsed']:.1f}s")
+
+@app.command()
+def jobs(
+    queue_path: Optional[str] = typer.Option(None, help="Job queue database (default: ORCHA_QUEUE_PATH or .orcha/jobs.db)"),
+    export: Optional[str] = typer.Option(None, help="Write finished jobs to this JSONL file"),
+    failed: bool = typer.Option(False, help="Export failed jobs instead of completed ones"),
+    retry: bool = typer.Option(False, help="Move failed jobs back to pending")
+):
+    """Show job queue status and export results"""
+    import json
+    
+    job_queue = get_job_queue(queue_path)
+    if retry:
+        typer.echo(f"🔁 Requeued {job_queue.retry_failed()} failed jobs")
+    
+    stats = job_queue.stats()
+    typer.echo(f"📋 Job Queue: {job_queue.path}")
+    typer.echo("="*30)
+    for status in ("pending", "leased", "done", "failed"):
+        typer.echo(f"   • {status:<8} {stats[status]}")
+    
+    if export:
+        count = 0
+        with open(export, 'w', encoding='utf-8') as f:
+            for record in job_queue.results("failed" if failed else "done"):
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                count += 1
+        typer.echo(f"💾 Exported {count} jobs to {export}")
+
 @app.command()
 def test():
     """Test API connection and basic functionality"""
@@ -187,10 +559,30 @@ def list_models():
     
     typer.echo("\n💡 Usage:")
     typer.echo("   model = PerplexityModel(api_key=key, model='sonar-pro')")
+    
+    # Latency recorded by the hedge policy (ORCHA_HEDGE_PERCENTILE) in earlier runs
+    # Read the file directly; importing the hedging module would slow this command down
+    import json
+    from .metrics import Histogram
+    try:
+        with open(os.getenv("ORCHA_LATENCY_PATH", DEFAULT_LATENCY_PATH), 'r') as f:
+            latency = json.load(f)
+    except (OSError, ValueError):
+        latency = {}
+    if latency:
+        typer.echo("\n⏱️  Observed Latency (recent requests):")
+        for name, samples in sorted(latency.items()):
+            histogram = Histogram()
+            for seconds in samples:
+                histogram.observe(seconds)
+            typer.echo(f"   • {name:<20} p50 {histogram.percentile(50) * 1000:7.0f}ms   "
+                       f"p95 {histogram.percentile(95) * 1000:7.0f}ms   "
+                       f"p99 {histogram.percentile(99) * 1000:7.0f}ms   ({len(samples)} samples)")
 
 @app.command()
 def config():
     """Show current configuration and setup guide"""
+    load_env()
     typer.echo("⚙️  Orcha Configuration")
     typer.echo("="*30)
     
@@ -211,8 +603,65 @@ def config():
         for name in model_registry.keys():
             typer.echo(f"   • {name}")
     
+    # Check response cache
+    cache = get_response_cache()
+    if cache:
+        typer.echo(f"🗄️  Response Cache: {cache.path}")
+        typer.echo(f"   • Hits: {cache.hits}  Misses: {cache.misses}")
+    else:
+        typer.echo("🗄️  Response Cache: Off (set ORCHA_CACHE_PATH to enable)")
+    
     typer.echo(f"\n📁 Current Directory: {os.getcwd()}")
 
+@app.command()
+def serve(
+    host: str = typer.Option("127.0.0.1", help="Address to listen on"),
+    port: int = typer.Option(8700, help="Port to listen on"),
+    chains_dir: str = typer.Option(".", help="Directory chain files are served from"),
+    model_name: str = typer.Option("default", help="Model to warm up at startup")
+):
+    """Run a local HTTP server with warm models and cached chains"""
+    from .server import serve as run_server
+    
+    # Create the model and its connection pool before the first request
+    get_or_create_model(model_name)
+    
+    def ready(server):
+        typer.echo(f"🛰️  Orcha server listening on http://{host}:{server.server_address[1]}")
+        typer.echo("   • GET  /health")
+        typer.echo('   • POST /prompt  {"text": "..."}')
+        typer.echo('   • POST /chain   {"file": "chain.yaml", "input": "..."}')
+    
+    run_server(get_or_create_model, host=host, port=port, chains_dir=chains_dir, on_ready=ready)
+
+@app.command()
+def checkpoints(
+    directory: str = typer.Option(".orcha/checkpoints", help="Checkpoint directory"),
+    clear: bool = typer.Option(False, help="Delete every checkpoint"),
+    max_mb: Optional[float] = typer.Option(None, help="Evict least recently used checkpoints down to this size")
+):
+    """Inspect or prune the step checkpoint store"""
+    if not Path(directory).exists():
+        typer.echo(f"📭 No checkpoints in {directory}")
+        return
+    
+    store = get_checkpoint_store(directory)
+    
+    if clear:
+        removed = store.clear()
+        typer.echo(f"🗑️  Removed {removed} checkpoints")
+    elif max_mb is not None:
+        removed = store.evict(max_bytes=int(max_mb * 1024 * 1024))
+        typer.echo(f"🗑️  Evicted {removed} checkpoints")
+    
+    stats = store.stats()
+    typer.echo(f"💾 Checkpoint Store: {stats['directory']}")
+    typer.echo(f"   • Entries: {stats['entries']}")
+    typer.echo(f"   • Size: {stats['bytes'] / 1024 / 1024:.1f} MB / {stats['max_bytes'] / 1024 / 1024:.0f} MB")
+    if stats["entries"]:
+        typer.echo(f"   • Oldest: {stats['oldest']}")
+        typer.echo(f"   • Newest: {stats['newest']}")
+
 @app.command()
 def create_example(name: str = typer.Argument("example_chain", help="Name for the example file")):
     """Create an example YAML chain file"""
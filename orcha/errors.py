@@ -0,0 +1,29 @@
+from typing import Optional
+
+
+class OrchaError(Exception):
+    """Base class for Orcha errors"""
+
+
+class APIRequestError(OrchaError):
+    """A model API request failed"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(APIRequestError):
+    """A request's deadline passed before the scheduler could send it"""
+
+
+class ErrorResponse(str):
+    """The error string ask() returns in place of a reply; error holds the exception"""
+
+    error: Optional[Exception] = None
+
+    def __new__(cls, message: str, error: Optional[Exception] = None):
+        value = super().__new__(cls, message)
+        value.error = error
+        return value
@@ -0,0 +1,102 @@
+import atexit
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Union
+
+INLINE = "inline"
+THREAD = "thread"
+PROCESS = "process"
+EXECUTION_CLASSES = (INLINE, THREAD, PROCESS)
+
+_executors: Dict[str, Executor] = {}
+_pool_sizes: Dict[str, Optional[int]] = {THREAD: None, PROCESS: None}
+_executors_lock = threading.Lock()
+
+
+def execution(kind: str):
+    """
+    Decorator declaring where a callable chain step runs:
+      - "inline": on the calling thread (the default)
+      - "thread": on the shared thread pool, for blocking I/O
+      - "process": on the shared process pool, for CPU-heavy work that
+        would otherwise hold the GIL. The function must be defined at module
+        level and its input and output must be picklable.
+
+    Example:
+        @execution("process")
+        def score(text):
+            ...
+    """
+    if kind not in EXECUTION_CLASSES:
+        raise ValueError(f"Unknown execution class '{kind}', expected one of {', '.join(EXECUTION_CLASSES)}")
+
+    def decorate(func: Callable) -> Callable:
+        func.orcha_execution = kind
+        return func
+    return decorate
+
+
+def execution_class(step: Union[dict, Callable]) -> str:
+    """Execution class of a step: its 'execution' key or decorator, else inline"""
+    if isinstance(step, dict):
+        # Graph steps may also carry a decorated 'run' callable
+        kind = step.get("execution") or getattr(step.get("run"), "orcha_execution", INLINE)
+    else:
+        kind = getattr(step, "orcha_execution", INLINE)
+    if kind not in EXECUTION_CLASSES:
+        raise ValueError(f"Unknown execution class '{kind}' for step {step!r}")
+    return kind
+
+
+def configure_executors(threads: Optional[int] = None, processes: Optional[int] = None):
+    """Set the shared pool sizes. Takes effect for pools not created yet."""
+    with _executors_lock:
+        if threads is not None:
+            _pool_sizes[THREAD] = threads
+        if processes is not None:
+            _pool_sizes[PROCESS] = processes
+
+
+def pool_size(kind: str) -> int:
+    """Number of workers in the shared pool for kind"""
+    if _pool_sizes.get(kind):
+        return _pool_sizes[kind]
+    cpus = os.cpu_count() or 1
+    return cpus if kind == PROCESS else min(32, cpus + 4)
+
+
+def get_executor(kind: str) -> Executor:
+    """Shared thread or process pool, created on first use"""
+    executor = _executors.get(kind)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(kind)
+            if executor is None:
+                if kind == THREAD:
+                    executor = ThreadPoolExecutor(max_workers=pool_size(THREAD), thread_name_prefix="orcha-step")
+                elif kind == PROCESS:
+                    executor = ProcessPoolExecutor(max_workers=pool_size(PROCESS))
+                else:
+                    raise ValueError(f"No executor for execution class '{kind}'")
+                _executors[kind] = executor
+    return executor
+
+
+def submit(kind: str, func: Callable[[Any], Any], data: Any) -> Future:
+    """Run func(data) on the shared pool for kind"""
+    if kind == THREAD:
+        # Keep the caller's request_context() for model calls made by the step
+        from .scheduler import with_request_context
+        func = with_request_context(func)
+    return get_executor(kind).submit(func, data)
+
+
+@atexit.register
+def shutdown_executors(wait: bool = True):
+    """Shut down the shared pools; they are recreated if used again"""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
@@ -0,0 +1,199 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Callable, Dict, Optional
+
+from .metrics import Histogram
+from .scheduler import with_request_context
+
+
+class HedgePolicy:
+    """
+    Opt-in request hedging to cut tail latency.
+
+    A request that may be hedged runs on its own thread, so the caller can
+    return whichever copy finishes first. If it has not finished the given
+    percentile of recently observed latency for that model after it
+    started, a duplicate is sent, to fallback_model when set, and whichever
+    succeeds first is returned. The slower request cannot be interrupted
+    mid-flight with requests, so it is abandoned and its result discarded;
+    a hedge still waiting for admission when the original finishes is
+    dropped unsent.
+    Requests that cannot be hedged (too little data or no hedge budget left)
+    run directly on the caller's thread. No pool bounds concurrency.
+
+    Hedges are capped at max_extra_rate of all requests (0.1 = at most 10%
+    extra), and no hedging happens until a model has min_samples latencies.
+
+    Example:
+        hedge = HedgePolicy(percentile=95, fallback_model="sonar")
+        model = PerplexityModel(api_key, hedge=hedge)
+    """
+
+    def __init__(self,
+                 percentile: float = 95,
+                 fallback_model: Optional[str] = None,
+                 max_extra_rate: float = 0.1,
+                 min_delay: float = 0.05,
+                 min_samples: int = 20,
+                 window: int = 500):
+        self.percentile = percentile
+        self.fallback_model = fallback_model
+        self.max_extra_rate = max_extra_rate
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.window = window
+        self.latency: Dict[str, Histogram] = {}
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._delays: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, model: str, seconds: float):
+        """Record a completed request's latency"""
+        with self._lock:
+            histogram = self.latency.get(model)
+            if histogram is None:
+                histogram = self.latency[model] = Histogram(max_samples=self.window)
+            histogram.observe(seconds)
+            # Sorting the window on every request is wasteful; refresh the trigger every few samples
+            if histogram.count % 10 == 0 or model not in self._delays:
+                self._delays[model] = histogram.percentile(self.percentile)
+
+    def delay(self, model: str) -> Optional[float]:
+        """Seconds to wait before hedging a request to model, or None while there is too little data"""
+        histogram = self.latency.get(model)
+        if histogram is None or len(histogram.samples) < self.min_samples:
+            return None
+        return max(self.min_delay, self._delays.get(model, 0.0))
+
+    def _hedge_budget(self) -> bool:
+        return self.hedges + 1 <= self.max_extra_rate * self.requests
+
+    def _allow_hedge(self) -> bool:
+        with self._lock:
+            if not self._hedge_budget():
+                return False
+            self.hedges += 1
+            return True
+
+    def _timed(self, model: str, call: Callable[[str, dict], Any], stats: dict):
+        start = time.perf_counter()
+        result = call(model, stats)
+        self.observe(model, time.perf_counter() - start)
+        return result
+
+    def _start(self, model: str, call: Callable[[str, dict], Any], stats: dict,
+               started: Optional[threading.Event] = None,
+               admit: Optional[Callable[[], Optional[Callable[[], None]]]] = None) -> Future:
+        """Run call on a new thread in the caller's request context, after admit() if given"""
+        future = Future()
+        timed = with_request_context(self._timed)
+        admitted = with_request_context(admit) if admit is not None else None
+
+        def target():
+            if started is not None:
+                started.set()
+            release = None
+            try:
+                if admitted is not None:
+                    release = admitted()
+                # Not sent, and not counted, if the race was decided while it waited for admission
+                if future.set_running_or_notify_cancel():
+                    future.set_result(timed(model, call, stats))
+                else:
+                    with self._lock:
+                        self.hedges -= 1
+            except BaseException as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            finally:
+                if release is not None:
+                    release()
+
+        threading.Thread(target=target, daemon=True, name="orcha-hedge").start()
+        return future
+
+    def run(self, model: str, call: Callable[[str, dict], Any], stats: dict,
+            admit: Optional[Callable[[], Optional[Callable[[], None]]]] = None) -> Any:
+        """
+        Run call(model_name, stats), hedging it if it is slow.
+        stats gets "hedged" and "hedge_won" flags when a hedge was sent.
+
+        call should be one network request that the caller has already
+        admitted (scheduler slot, rate limit), so only its own latency is
+        timed. admit, when given, is run on the hedge's thread before the
+        duplicate is sent and returns a callable releasing what it took.
+        """
+        with self._lock:
+            self.requests += 1
+            hedgeable = self._hedge_budget()
+        delay = self.delay(model)
+        if delay is None or not hedgeable:
+            return self._timed(model, call, stats)
+
+        # The hedge delay counts from when the primary actually starts
+        started = threading.Event()
+        primary = self._start(model, call, stats, started)
+        started.wait()
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._allow_hedge():
+            return primary.result()
+
+        hedge = self._start(self.fallback_model or model, call, {}, admit=admit)
+        stats["hedged"] = True
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    hedge.cancel()
+                    stats["hedge_won"] = future is hedge
+                    if future is hedge:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    return future.result()
+        # Both failed; report the original request's error
+        return primary.result()
+
+    def latency_summary(self) -> Dict[str, Dict[str, float]]:
+        """p50/p95/p99 of the recent latency window per model"""
+        with self._lock:
+            return {model: histogram.summary() for model, histogram in sorted(self.latency.items())}
+
+    def stats(self) -> Dict[str, Any]:
+        """Request, hedge and hedge-win counts"""
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "extra_rate": self.hedges / self.requests if self.requests else 0.0,
+        }
+
+    def save(self, path: str):
+        """Write the latency windows to a JSON file so later runs start warm"""
+        with self._lock:
+            data = {model: list(histogram.samples) for model, histogram in self.latency.items()}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(data, f)
+
+    def load(self, path: str):
+        """Seed the latency windows from a file written by save(); a missing file is ignored"""
+        for model, samples in load_latency(path).items():
+            for seconds in samples:
+                self.observe(model, seconds)
+
+
+def load_latency(path: str) -> Dict[str, list]:
+    """Latency samples per model from a file written by HedgePolicy.save()"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
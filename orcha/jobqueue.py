@@ -0,0 +1,267 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+
+class Job:
+    """A leased job: its id, task description and input"""
+
+    __slots__ = ("id", "task", "input", "attempts")
+
+    def __init__(self, id: int, task: dict, input: Any, attempts: int):
+        self.id = id
+        self.task = task
+        self.input = input
+        self.attempts = attempts
+
+    def __repr__(self):
+        return f"Job(id={self.id}, attempts={self.attempts})"
+
+
+class JobQueue:
+    """
+    Persistent job queue in a SQLite file, shared by any number of worker
+    processes on one or more hosts.
+
+    A job is a task (a JSON-serializable dict, e.g. {"chain": {...}} or
+    {"template": "..."}) plus an input. Workers lease jobs for lease_seconds
+    and must heartbeat to keep them; a job whose lease expires, because its
+    worker crashed or hung, is handed to the next worker that asks. Jobs that
+    fail or expire max_attempts times are marked failed.
+
+    The database uses SQLite's rollback journal rather than WAL so that it
+    also works on network filesystems, as long as they support file locking.
+    """
+
+    def __init__(self, path: str = ".orcha/jobs.db", lease_seconds: float = 60.0):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # Autocommit mode; transactions that must be atomic use BEGIN IMMEDIATE
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, task TEXT NOT NULL, input TEXT, "
+            "status TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0, "
+            "max_attempts INTEGER NOT NULL DEFAULT 3, worker TEXT, lease_expires REAL, "
+            "result TEXT, error TEXT, created REAL, updated REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)")
+
+    def enqueue(self, input: Any, task: dict, max_attempts: int = 3) -> int:
+        """Add one job and return its id"""
+        return self.enqueue_many([input], task, max_attempts)[0]
+
+    def enqueue_many(self, inputs: Iterable[Any], task: dict, max_attempts: int = 3) -> List[int]:
+        """Add a job per input in one transaction and return their ids"""
+        task_json = json.dumps(task)
+        now = time.time()
+        ids = []
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for value in inputs:
+                    cursor = self._db.execute(
+                        "INSERT INTO jobs (task, input, max_attempts, created, updated) VALUES (?, ?, ?, ?, ?)",
+                        (task_json, json.dumps(value), max_attempts, now, now)
+                    )
+                    ids.append(cursor.lastrowid)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return ids
+
+    def lease(self, worker: str, limit: int = 1) -> List[Job]:
+        """Lease up to limit pending or expired jobs to worker"""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                # Expired leases that have used up their attempts are not retried again
+                self._db.execute(
+                    "UPDATE jobs SET status = 'failed', error = 'Lease expired after ' || attempts || ' attempts', "
+                    "updated = ? WHERE status = 'leased' AND lease_expires < ? AND attempts >= max_attempts",
+                    (now, now)
+                )
+                rows = self._db.execute(
+                    "SELECT id, task, input, attempts FROM jobs "
+                    "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                    "ORDER BY id LIMIT ?",
+                    (now, limit)
+                ).fetchall()
+                if rows:
+                    self._db.executemany(
+                        "UPDATE jobs SET status = 'leased', worker = ?, lease_expires = ?, "
+                        "attempts = attempts + 1, updated = ? WHERE id = ?",
+                        [(worker, now + self.lease_seconds, now, row[0]) for row in rows]
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return [Job(row[0], json.loads(row[1]), json.loads(row[2]), row[3] + 1) for row in rows]
+
+    def heartbeat(self, worker: str, job_ids: List[int]) -> int:
+        """Extend worker's leases on job_ids; returns how many are still held"""
+        if not job_ids:
+            return 0
+        now = time.time()
+        with self._lock:
+            held = 0
+            for job_id in job_ids:
+                cursor = self._db.execute(
+                    "UPDATE jobs SET lease_expires = ?, updated = ? "
+                    "WHERE id = ? AND worker = ? AND status = 'leased'",
+                    (now + self.lease_seconds, now, job_id, worker)
+                )
+                held += cursor.rowcount
+        return held
+
+    def complete(self, worker: str, job_id: int, result: Any) -> bool:
+        """Store a job's result. Returns False if worker no longer held the lease."""
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_expires = NULL, updated = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (json.dumps(result, default=str), time.time(), job_id, worker)
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, worker: str, job_id: int, error: str) -> bool:
+        """Record a failed attempt; the job is retried until it reaches max_attempts"""
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END, "
+                "error = ?, lease_expires = NULL, updated = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (error, time.time(), job_id, worker)
+            )
+        return cursor.rowcount == 1
+
+    def results(self, status: str = "done") -> Iterator[Dict[str, Any]]:
+        """Finished jobs in id order as {"id", "input", "output"} or {"id", "input", "error"}"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, input, result, error FROM jobs WHERE status = ? ORDER BY id", (status,)
+            ).fetchall()
+        for job_id, value, result, error in rows:
+            record = {"id": job_id, "input": json.loads(value)}
+            if status == "done":
+                record["output"] = json.loads(result)
+            else:
+                record["error"] = error
+            yield record
+
+    def retry_failed(self) -> int:
+        """Move failed jobs back to pending with fresh attempts"""
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = 'pending', attempts = 0, worker = NULL, updated = ? WHERE status = 'failed'",
+                (time.time(),)
+            )
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        """Number of jobs per status"""
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        counts.update(dict(rows))
+        return counts
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def default_worker_id() -> str:
+    """Unique id for this worker process: host, pid and a random suffix"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+def run_worker(job_queue: JobQueue,
+               process: Callable[[Job], Any],
+               worker: Optional[str] = None,
+               concurrency: int = 4,
+               poll_interval: float = 1.0,
+               exit_when_empty: bool = False,
+               progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+               stop: Optional[threading.Event] = None) -> Dict[str, Any]:
+    """
+    Lease jobs from job_queue and run process(job) on up to concurrency at once.
+
+    A background thread heartbeats every lease_seconds / 3 so long jobs keep
+    their lease. Results are written back with complete(); exceptions are
+    recorded with fail() and the job is retried by any worker.
+
+    Runs until stop is set, or with exit_when_empty until no job is pending
+    or leased by any worker. Returns counts of completed and failed jobs.
+    """
+    worker = worker or default_worker_id()
+    stop = stop or threading.Event()
+    stats = {"worker": worker, "completed": 0, "failed": 0, "lost": 0, "elapsed": 0.0}
+    start = time.perf_counter()
+    running: Dict[int, Job] = {}
+    running_lock = threading.Lock()
+    job_finished = threading.Event()
+    finished = threading.Event()
+
+    def heartbeats():
+        while not finished.wait(job_queue.lease_seconds / 3):
+            with running_lock:
+                job_ids = list(running)
+            job_queue.heartbeat(worker, job_ids)
+
+    def run(job: Job):
+        try:
+            result = process(job)
+        except Exception as e:
+            recorded = job_queue.fail(worker, job.id, f"{type(e).__name__}: {e}")
+            outcome = "failed" if recorded else "lost"
+        else:
+            recorded = job_queue.complete(worker, job.id, result)
+            outcome = "completed" if recorded else "lost"
+        with running_lock:
+            running.pop(job.id, None)
+            # "lost" means the lease expired and another worker took the job over
+            stats[outcome] += 1
+            stats["elapsed"] = time.perf_counter() - start
+            if progress:
+                progress(stats)
+        job_finished.set()
+
+    heartbeat_thread = threading.Thread(target=heartbeats, daemon=True)
+    heartbeat_thread.start()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            while not stop.is_set():
+                with running_lock:
+                    busy = len(running)
+                free = concurrency - busy
+                jobs = job_queue.lease(worker, free) if free > 0 else []
+                if not jobs:
+                    # Jobs leased elsewhere may still come back if their worker dies, so wait them out
+                    if busy == 0 and exit_when_empty and not job_queue.stats()["leased"]:
+                        break
+                    # Wake up when a job finishes or after poll_interval to look for new work
+                    job_finished.wait(poll_interval)
+                    job_finished.clear()
+                    continue
+                with running_lock:
+                    for job in jobs:
+                        running[job.id] = job
+                for job in jobs:
+                    pool.submit(run, job)
+    finally:
+        finished.set()
+    stats["elapsed"] = time.perf_counter() - start
+    return stats
@@ -0,0 +1,166 @@
+import json
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List
+
+# Event hooks registered with add_hook(); each is called with one event dict
+_hooks: List[Callable[[Dict[str, Any]], None]] = []
+
+
+def add_hook(hook: Callable[[Dict[str, Any]], None]):
+    """
+    Register a callable that receives every instrumentation event.
+
+    Events are dicts with a "type" key:
+      - "request": one model API call (model, wall_time, queue_time,
+        network_time, prompt_tokens, completion_tokens, cache_hit, attempts, status)
+      - "step": one chain step (chain, step, index, wall_time, status)
+    Times are in seconds.
+    """
+    if hook not in _hooks:
+        _hooks.append(hook)
+    return hook
+
+
+def remove_hook(hook: Callable[[Dict[str, Any]], None]):
+    """Unregister a hook added with add_hook()"""
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+
+def has_hooks() -> bool:
+    """Whether anything is listening, so callers can skip building events"""
+    return bool(_hooks)
+
+
+def emit(event: Dict[str, Any]):
+    """Send an event to every registered hook"""
+    for hook in list(_hooks):
+        hook(event)
+
+
+class Histogram:
+    """Keeps the most recent observations of a value and reports percentiles"""
+
+    def __init__(self, max_samples: int = 10000):
+        self.samples = deque(maxlen=max_samples)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def percentile(self, p: float) -> float:
+        """Nearest-rank percentile (p between 0 and 100) of the kept samples"""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, int(round(p / 100.0 * len(ordered))) - 1))
+        return ordered[index]
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+class MetricsAggregator:
+    """
+    Hook that aggregates events into latency histograms and token counters.
+
+    Usage:
+        metrics = add_hook(MetricsAggregator())
+        model.execute_chain(steps, text)
+        print(metrics.format_text())
+    """
+
+    REQUEST_TIMINGS = ("wall_time", "queue_time", "network_time")
+
+    def __init__(self):
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: Dict[str, Any]):
+        with self._lock:
+            if event.get("type") == "request":
+                model = event.get("model", "unknown")
+                for timing in self.REQUEST_TIMINGS:
+                    if timing in event:
+                        self._observe(f"request.{timing}.{model}", event[timing])
+                self._count("requests", 1)
+                self._count("prompt_tokens", event.get("prompt_tokens") or 0)
+                self._count("completion_tokens", event.get("completion_tokens") or 0)
+                self._count("cache_hits", 1 if event.get("cache_hit") else 0)
+                self._count("coalesced", 1 if event.get("coalesced") else 0)
+                self._count("hedged", 1 if event.get("hedged") else 0)
+                self._count("request_errors", 1 if event.get("status") == "error" else 0)
+            elif event.get("type") == "step":
+                self._observe(f"step.wall_time.{event.get('step', 'unknown')}", event.get("wall_time", 0.0))
+                self._count("steps", 1)
+                self._count("step_errors", 1 if event.get("status") == "error" else 0)
+
+    def _observe(self, name: str, value: float):
+        if name not in self.histograms:
+            self.histograms[name] = Histogram()
+        self.histograms[name].observe(value)
+
+    def _count(self, name: str, value: float):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self) -> Dict[str, Any]:
+        """Counters and a p50/p95/p99 summary for every histogram"""
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "histograms": {name: histogram.summary() for name, histogram in sorted(self.histograms.items())},
+            }
+
+    def to_json(self) -> str:
+        """Summary as a JSON string"""
+        return json.dumps(self.summary(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Summary in the Prometheus text exposition format"""
+        summary = self.summary()
+        lines = []
+        for name, value in sorted(summary["counters"].items()):
+            lines.append(f"# TYPE orcha_{name}_total counter")
+            lines.append(f"orcha_{name}_total {value}")
+        # One TYPE line per metric family, followed by all of its labelled samples
+        families: Dict[str, List[str]] = {}
+        for name, stats in summary["histograms"].items():
+            kind, timing, label = name.split(".", 2)
+            metric = f"orcha_{kind}_{timing}_seconds"
+            label_name = "model" if kind == "request" else "step"
+            label_value = label.replace("\\", "\\\\").replace('"', '\\"')
+            samples = families.setdefault(metric, [])
+            for quantile in ("p50", "p95", "p99"):
+                q = int(quantile[1:]) / 100.0
+                samples.append(f'{metric}{{{label_name}="{label_value}",quantile="{q}"}} {stats[quantile]}')
+            samples.append(f'{metric}_sum{{{label_name}="{label_value}"}} {stats["sum"]}')
+            samples.append(f'{metric}_count{{{label_name}="{label_value}"}} {stats["count"]}')
+        for metric, samples in families.items():
+            lines.append(f"# TYPE {metric} summary")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+    def format_text(self) -> str:
+        """Human-readable breakdown table"""
+        summary = self.summary()
+        lines = [f"{'metric':<50} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9}"]
+        for name, stats in summary["histograms"].items():
+            lines.append(
+                f"{name:<50} {stats['count']:>6} "
+                f"{stats['p50'] * 1000:>7.1f}ms {stats['p95'] * 1000:>7.1f}ms {stats['p99'] * 1000:>7.1f}ms"
+            )
+        lines.append("")
+        for name, value in sorted(summary["counters"].items()):
+            lines.append(f"{name:<50} {value:>6}")
+        return "\n".join(lines)
@@ -1,8 +1,73 @@
 from abc import ABC, abstractmethod
-from typing import Any, List, Union, Callable, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, List, Tuple, Union, Callable, Optional
+import time
 import requests
 import json
 
+from . import metrics
+from .cache import ResponseCache
+from .errors import APIRequestError, DeadlineExceeded, ErrorResponse
+from .ratelimit import RateLimiter, RetryPolicy, parse_retry_after
+from .scheduler import current_request_context, with_request_context
+from .singleflight import SingleFlight
+from .tokens import estimate_message_tokens
+from .tools import match_choice, truncate_at_stop
+from .transport import HTTPTransport, get_default_transport, iter_sse_data
+
+if TYPE_CHECKING:
+    import asyncio
+    from .checkpoint import CheckpointStore
+    from .session import ChatSession
+    from .semantic_cache import SemanticCache
+    from .hedging import HedgePolicy
+    from .scheduler import RequestScheduler
+    from .tools import AITools
+
+
+def _error_response(message: str, error: Exception) -> ErrorResponse:
+    """Error string returned by ask() in place of a reply, noted so a checkpointed step isn't saved"""
+    from .checkpoint import record_failure
+    record_failure(error)
+    return ErrorResponse(message, error)
+
+
+def reply_text(response_data: dict, params: Optional[dict] = None) -> Optional[str]:
+    """
+    Reply text of a chat completions response, or None if it has none.
+    params may carry stop sequences to cut at and choices to snap the reply to.
+    """
+    choices = response_data.get("choices") or []
+    if not choices:
+        return None
+    content = choices[0]["message"]["content"]
+    if params:
+        content = truncate_at_stop(content, params.get("stop"))
+        if params.get("choices"):
+            content = match_choice(content, params["choices"]) or content.strip()
+    return content
+
+
+class BatchResults(list):
+    """Ordered results of ask_many(): response strings or APIRequestError objects"""
+    
+    elapsed = 0.0
+    
+    @property
+    def errors(self) -> List[APIRequestError]:
+        """Errors for the prompts that failed"""
+        return [item for item in self if isinstance(item, APIRequestError)]
+    
+    @property
+    def succeeded(self) -> int:
+        """Number of prompts that got a response"""
+        return len(self) - len(self.errors)
+    
+    @property
+    def throughput(self) -> float:
+        """Prompts completed per second"""
+        return len(self) / self.elapsed if self.elapsed else 0.0
+
 
 class BaseModel(ABC):
     def __init__(self):
@@ -21,6 +86,11 @@ class BaseModel(ABC):
         """Send a prompt to the model and return the response."""
         pass
 
+    async def aask(self, prompt: str, **kwargs) -> str:
+        """Async version of ask(). Runs ask() in a worker thread unless overridden."""
+        import asyncio
+        return await asyncio.to_thread(self.ask, prompt, **kwargs)
+
     @abstractmethod
     def execute_chain(self, chain_steps: List[Union[dict, Callable]], initial_input: Any = None) -> Any:
         """Execute a chain of steps, returning the collective result."""
@@ -34,68 +104,728 @@ class BaseModel(ABC):
 
 
 class PerplexityModel(BaseModel):
-    def __init__(self, api_key: str, model: str = "sonar-pro"):
+    def __init__(self,
+                 api_key: str,
+                 model: str = "sonar-pro",
+                 transport: Optional[HTTPTransport] = None,
+                 max_concurrency: int = 10,
+                 cache: Optional[ResponseCache] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 retry: Optional[RetryPolicy] = None,
+                 base_url: str = "https://api.perplexity.ai",
+                 semantic_cache: Optional["SemanticCache"] = None,
+                 coalesce: bool = True,
+                 hedge: Optional["HedgePolicy"] = None,
+                 scheduler: Optional["RequestScheduler"] = None,
+                 priority: str = "default",
+                 tenant: str = "default"):
         super().__init__()
         self.api_key = api_key
         self.model = model
-        self.base_url = "https://api.perplexity.ai"
+        self.base_url = base_url.rstrip("/")
         self.endpoint = f"{self.base_url}/chat/completions"
+        # Models without an explicit transport share one process-wide connection pool
+        self.transport = transport or get_default_transport()
+        self.headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        # Bounds the number of aask() requests in flight at once
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+        self._semaphore_loop = None
+        # aask() requests in flight on the current event loop, by coalescing key
+        self._flights = {}
+        self._flights_loop = None
+        # Optional response cache, keyed by model, messages and generation params
+        self.cache = cache
+        # Optional limiter; use get_rate_limiter(api_key) to share it between models
+        self.rate_limiter = rate_limiter
+        self.retry = retry or RetryPolicy()
+        # Optional near-duplicate prompt cache consulted by ask()
+        self.semantic_cache = semantic_cache
+        # Concurrent identical complete() calls share one HTTP request
+        self.singleflight = SingleFlight() if coalesce else None
+        # Optional hedging of slow requests; may be shared between models
+        self.hedge = hedge
+        # Optional shared admission queue; request_context() overrides priority and tenant per call
+        self.scheduler = scheduler
+        self.priority = priority
+        self.tenant = tenant
 
-    def ask(self, prompt: str, use_tools: bool = True, max_tokens: int = 500, temperature: float = 0.7) -> str:
-        """Send a prompt to the model and return the response."""
-        
-        # Prepare messages
+    def _build_messages(self, prompt: str, use_tools: bool, system_prompt: Optional[str] = None) -> List[dict]:
+        """Build the message list for a prompt, including the tools system prompt"""
         messages = []
         
         # Get system prompt from tools if available
-        if use_tools and self._tools and self._tools.system_prompts:
+        if system_prompt is None and use_tools and self._tools and self._tools.system_prompts:
             system_prompt = self._tools.get_combined_system_prompt()
+        if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
         
         # Add user prompt
         messages.append({"role": "user", "content": prompt})
-        
-        # Prepare request payload
+        return messages
+
+    def _build_payload(self, messages: List[dict], max_tokens: int, temperature: float,
+                       stop: Optional[List[str]] = None) -> dict:
+        """Build the chat completions request body"""
         payload = {
             "model": self.model,
             "messages": messages,
             "max_tokens": max_tokens,
             "temperature": temperature
         }
+        if stop:
+            payload["stop"] = stop
+        return payload
+
+    def _generation_params(self, tools: Optional["AITools"], max_tokens: Optional[int],
+                           temperature: Optional[float]) -> dict:
+        """
+        Generation settings for a request: explicit arguments first, then the
+        settings of tools' active tools, then the defaults of 500 tokens at 0.7.
+        """
+        params = tools.get_generation_params() if tools else {}
+        params["max_tokens"] = max_tokens if max_tokens is not None else params.get("max_tokens", 500)
+        params["temperature"] = temperature if temperature is not None else params.get("temperature", 0.7)
+        return params
+
+    def _tool_names(self, tools: Optional["AITools"]) -> List[str]:
+        """Names of the tools applied to a request"""
+        if tools and tools.active_tools:
+            return tools.list_active_tools()
+        return []
+
+    def _format_response(self, response_data: dict, tool_names: List[str], raw: bool = False,
+                         params: Optional[dict] = None) -> str:
+        """
+        Extract the reply text from a chat completions response.
+        params may carry stop sequences to cut at and choices to snap the reply to.
+        """
+        content = reply_text(response_data, params)
+        if content is not None:
+            # Add tool info for debugging if tools are active
+            if tool_names and not raw:
+                return f"[Using tools: {', '.join(tool_names)}] {content}"
+            else:
+                return content
+        else:
+            return "No response content received from API"
+
+    def _estimate_tokens(self, payload: dict) -> int:
+        """Rough token count of a request for tokens-per-minute limiting"""
+        return estimate_message_tokens(payload["messages"]) + payload["max_tokens"]
+
+    def checkpoint_identity(self) -> str:
+        """What determines this model's replies, for checkpoint keys of steps that call it"""
+        system_prompt = self._tools.get_combined_system_prompt() if self._tools else ""
+        params = sorted(self._tools.get_generation_params().items()) if self._tools else []
+        return f"{self.model}|{self.base_url}|{system_prompt}|{params!r}"
+
+    def estimate_input_tokens(self, prompt: str, use_tools: bool = True) -> int:
+        """Estimated prompt tokens ask(prompt) would send, including the tools system prompt"""
+        return estimate_message_tokens(self._build_messages(prompt, use_tools))
+
+    def _send(self, payload: dict, stream: bool = False, stats: Optional[dict] = None):
+        """
+        POST payload, applying the scheduler and rate limiter and retrying transient failures.
+        Time spent waiting and on the network is added to stats when given.
+        A streamed response keeps its scheduler slot; the caller releases it
+        once the stream is closed.
+        """
+        stats = stats if stats is not None else {}
+        attempt = 0
+        while True:
+            if self.scheduler is not None:
+                # Wait for a slot in priority / fair-share order; raises DeadlineExceeded if dropped
+                context = current_request_context()
+                stats["queue_time"] = stats.get("queue_time", 0.0) + self.scheduler.acquire(
+                    context.get("priority", self.priority), context.get("tenant", self.tenant), context.get("deadline")
+                )
+            try:
+                response, error = self._attempt(payload, stream, stats, attempt)
+            except BaseException:
+                if self.scheduler is not None:
+                    self.scheduler.release()
+                raise
+            if self.scheduler is not None and (response is None or not stream):
+                self.scheduler.release()
+            if response is not None:
+                return response
+            
+            backoff = self.retry.delay(attempt, error.retry_after)
+            stats["queue_time"] = stats.get("queue_time", 0.0) + backoff
+            time.sleep(backoff)
+            attempt += 1
+
+    def _attempt(self, payload: dict, stream: bool, stats: dict, attempt: int):
+        """
+        Make one request. Returns (response, None) on success or (None, error)
+        when the error should be retried; other errors are raised.
+        """
+        if self.rate_limiter:
+            stats["queue_time"] = stats.get("queue_time", 0.0) + self.rate_limiter.acquire(self._estimate_tokens(payload))
         
-        # Prepare headers
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
+        stats["attempts"] = attempt + 1
+        sent = time.perf_counter()
+        try:
+            if self.hedge is None or stream:
+                response = self._post(payload, stream)
+            else:
+                # The hedge may go to a fallback model, so the model name is filled in per copy
+                response = self.hedge.run(payload["model"], lambda model, _: self._post(dict(payload, model=model)),
+                                          stats, admit=lambda: self._admit_hedge(payload))
+            if self.rate_limiter:
+                self.rate_limiter.on_success()
+            return response, None
+        except requests.exceptions.RequestException as e:
+            status_code = e.response.status_code if e.response is not None else None
+            retry_after = parse_retry_after(e.response.headers.get("Retry-After")) if e.response is not None else None
+            error = APIRequestError(str(e), status_code=status_code, retry_after=retry_after)
+            if status_code == 429 and self.rate_limiter:
+                self.rate_limiter.on_throttle(retry_after)
+            if not self.retry.should_retry(error, attempt):
+                raise error from e
+            return None, error
+        finally:
+            stats["network_time"] = stats.get("network_time", 0.0) + time.perf_counter() - sent
+
+    def _post(self, payload: dict, stream: bool = False):
+        """Make one API request over the pooled, keep-alive transport"""
+        response = self.transport.post(self.endpoint, headers=self.headers, json=payload, stream=stream)
+        response.raise_for_status()
+        return response
+
+    def _admit_hedge(self, payload: dict) -> Optional[Callable[[], None]]:
+        """Take a scheduler slot and rate limit capacity for a hedged copy; returns the slot's release"""
+        if self.scheduler is not None:
+            context = current_request_context()
+            self.scheduler.acquire(context.get("priority", self.priority), context.get("tenant", self.tenant),
+                                   context.get("deadline"))
+        if self.rate_limiter:
+            self.rate_limiter.acquire(self._estimate_tokens(payload))
+        return self.scheduler.release if self.scheduler is not None else None
+
+    def _post_json(self, payload: dict, stats: dict):
+        """Send payload and return the decoded response body and headers"""
+        response = self._send(payload, stats=stats)
+        try:
+            return response.json(), response.headers
+        except ValueError as e:
+            raise APIRequestError(f"Invalid JSON in API response: {e}", status_code=response.status_code) from e
+
+    def _record_request(self, start: float, stats: dict, response_data: Optional[dict] = None,
+                        headers: Optional[dict] = None, cache_hit: bool = False,
+                        error: Optional[Exception] = None, **extra):
+        """Emit a "request" instrumentation event if any hooks are registered"""
+        if not metrics.has_hooks():
+            return
+        usage = (response_data or {}).get("usage") or {}
+        event = {
+            "type": "request",
+            "model": self.model,
+            "wall_time": time.perf_counter() - start,
+            "queue_time": stats.get("queue_time", 0.0),
+            "network_time": stats.get("network_time", 0.0),
+            "attempts": stats.get("attempts", 0),
+            "prompt_tokens": usage.get("prompt_tokens"),
+            "completion_tokens": usage.get("completion_tokens"),
+            "cache_hit": cache_hit,
+            "status": "error" if error else "ok",
+            "headers": dict(headers) if headers else {},
         }
+        if error:
+            event["error"] = str(error)
+            event["status_code"] = getattr(error, "status_code", None)
+        event.update(extra)
+        metrics.emit(event)
+
+    def complete(self, messages: List[dict], max_tokens: int = 500, temperature: float = 0.7,
+                 stop: Optional[List[str]] = None) -> dict:
+        """
+        Send a full message list and return the raw response data.
+        Unlike ask(), failures raise APIRequestError instead of returning an error string.
+        Identical requests already in flight on this model are coalesced into one.
+        """
+        start = time.perf_counter()
+        stats = {}
+        
+        cache_key = None
+        if self.cache is not None or self.singleflight is not None:
+            cache_key = ResponseCache.make_key(self.model, messages, max_tokens, temperature, stop)
+        if self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self._record_request(start, stats, cached, cache_hit=True)
+                return cached
+        
+        if self.singleflight is None:
+            return self._fetch(messages, max_tokens, temperature, start, stats, cache_key, stop)
         
+        led = []
+        
+        def fetch():
+            led.append(True)
+            return self._fetch(messages, max_tokens, temperature, start, stats, cache_key, stop)
+        
+        flight_key = cache_key
+        if self.scheduler is not None:
+            # Only share a request queued at the caller's own priority, never wait behind a lower one
+            flight_key = f"{cache_key}:{current_request_context().get('priority', self.priority)}"
         try:
-            # Make API request
-            response = requests.post(self.endpoint, headers=headers, json=payload)
-            response.raise_for_status()
-            
-            # Parse response
-            response_data = response.json()
-            
-            # Extract content from response
-            if "choices" in response_data and len(response_data["choices"]) > 0:
-                content = response_data["choices"][0]["message"]["content"]
-                
-                # Add tool info for debugging if tools are active
-                if use_tools and self._tools and self._tools.active_tools:
-                    tool_names = ", ".join(self._tools.list_active_tools())
-                    return f"[Using tools: {tool_names}] {content}"
-                else:
-                    return content
-            else:
-                return "No response content received from API"
+            response_data, shared = self.singleflight.do(flight_key, fetch)
+        except DeadlineExceeded:
+            if led:
+                raise
+            # The leader's deadline passed while it was queued; this caller's may not have
+            return self._fetch(messages, max_tokens, temperature, start, stats, cache_key, stop)
+        except APIRequestError as e:
+            if not led:
+                # Waited on another caller's request, which failed
+                self._record_request(start, stats, error=e, coalesced=True)
+            raise
+        if shared:
+            self._record_request(start, stats, response_data, coalesced=True)
+        return response_data
+
+    def _fetch(self, messages: List[dict], max_tokens: int, temperature: float,
+               start: float, stats: dict, cache_key: Optional[str], stop: Optional[List[str]] = None) -> dict:
+        """Send one request, record it and store the reply in the response cache"""
+        payload = self._build_payload(messages, max_tokens, temperature, stop)
+        
+        try:
+            response_data, headers = self._post_json(payload, stats)
+        except APIRequestError as e:
+            self._record_request(start, stats, error=e)
+            raise
+        
+        extra = {"hedged": True, "hedge_won": stats.get("hedge_won", False)} if stats.get("hedged") else {}
+        self._record_request(start, stats, response_data, headers=headers, **extra)
+        if self.cache is not None and response_data.get("choices"):
+            self.cache.set(cache_key, response_data)
+        return response_data
+
+    def ask(self, prompt: str, use_tools: bool = True, max_tokens: Optional[int] = None,
+            temperature: Optional[float] = None, raise_errors: bool = False, raw: bool = False) -> str:
+        """
+        Send a prompt to the model and return the response.
+        
+        max_tokens and temperature default to the active tools' generation
+        settings (see AITools.get_generation_params), else 500 and 0.7. When a
+        tool constrains the answer to a set of choices, the reply is snapped
+        to one of them, asking once more if it matches none. Set raw to get
+        the content without the "[Using tools: ...]" prefix.
+        
+        Failures are returned as an error string (an ErrorResponse) unless
+        raise_errors is set, in which case APIRequestError is raised.
+        """
+        tools = self._tools if use_tools else None
+        try:
+            response_data, params = self.generate(prompt, tools, max_tokens, temperature)
+            return self._format_response(response_data, self._tool_names(tools), raw, params)
                 
+        except APIRequestError as e:
+            if raise_errors:
+                raise
+            return _error_response(f"API Request Error: {str(e)}", e)
+        except Exception as e:
+            if raise_errors:
+                raise
+            return _error_response(f"Unexpected error: {str(e)}", e)
+
+    def generate(self, prompt: str, tools: Optional["AITools"] = None, max_tokens: Optional[int] = None,
+                 temperature: Optional[float] = None) -> Tuple[dict, dict]:
+        """
+        Get the raw response data for a prompt under the system prompt and
+        generation settings of tools, which need not be this model's own
+        (the server configures a fresh AITools per request).
+        
+        This is what ask() does before formatting: the semantic cache is
+        consulted and a reply matching none of a tool's choices is re-asked
+        once. Returns the response data and the generation params used;
+        failures raise APIRequestError.
+        """
+        system_prompt = tools.get_combined_system_prompt() if tools and tools.system_prompts else ""
+        messages = self._build_messages(prompt, False, system_prompt=system_prompt)
+        params = self._generation_params(tools, max_tokens, temperature)
+        generation = repr((params["max_tokens"], params["temperature"], params.get("stop")))
+        
+        if self.semantic_cache is not None:
+            start = time.perf_counter()
+            cached = self.semantic_cache.get(self.model, system_prompt, prompt, generation)
+            if cached is not None:
+                self._record_request(start, {}, cached, cache_hit=True, semantic=True)
+                return cached, params
+        
+        response_data = self.complete(messages, params["max_tokens"], params["temperature"], params.get("stop"))
+        if params.get("choices"):
+            response_data = self._constrain_choice(messages, response_data, params)
+        if self.semantic_cache is not None and response_data.get("choices"):
+            self.semantic_cache.set(self.model, system_prompt, prompt, response_data, generation)
+        return response_data, params
+
+    def _constrain_choice(self, messages: List[dict], response_data: dict, params: dict) -> dict:
+        """Re-ask once, at temperature 0, when a reply matches none of params["choices"]"""
+        choices = response_data.get("choices") or []
+        if not choices:
+            return response_data
+        content = truncate_at_stop(choices[0]["message"]["content"], params.get("stop"))
+        if match_choice(content, params["choices"]) is not None:
+            return response_data
+        
+        retry_messages = messages + [
+            {"role": "assistant", "content": content},
+            {"role": "user", "content": f"Answer with exactly one of: {', '.join(params['choices'])}"},
+        ]
+        retried = self.complete(retry_messages, params["max_tokens"], 0.0, params.get("stop"))
+        retried_choices = retried.get("choices") or []
+        if retried_choices and match_choice(
+                truncate_at_stop(retried_choices[0]["message"]["content"], params.get("stop")), params["choices"]):
+            return retried
+        return response_data
+
+    def ask_stream(self, prompt: str, use_tools: bool = True, max_tokens: Optional[int] = None,
+                   temperature: Optional[float] = None) -> Iterator[str]:
+        """
+        Send a prompt and yield the reply as content deltas while it is generated.
+        
+        The generator can be handed to the next chain step, which can consume
+        it incrementally. Failures raise APIRequestError.
+        """
+        messages = self._build_messages(prompt, use_tools)
+        params = self._generation_params(self._tools if use_tools else None, max_tokens, temperature)
+        max_tokens, temperature, stop = params["max_tokens"], params["temperature"], params.get("stop")
+        start = time.perf_counter()
+        stats = {}
+        
+        cache_key = None
+        if self.cache is not None:
+            cache_key = ResponseCache.make_key(self.model, messages, max_tokens, temperature, stop)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self._record_request(start, stats, cached, cache_hit=True)
+                yield self._format_response(cached, [])
+                return
+        
+        payload = self._build_payload(messages, max_tokens, temperature, stop)
+        payload["stream"] = True
+        parts = []
+        usage = None
+        first_token_time = None
+        
+        response = None
+        try:
+            response = self._send(payload, stream=True, stats=stats)
+            with response:
+                for data in iter_sse_data(response.iter_lines(decode_unicode=True)):
+                    try:
+                        chunk = json.loads(data)
+                    except ValueError as e:
+                        raise APIRequestError(f"Invalid JSON in API stream: {e}",
+                                              status_code=response.status_code) from e
+                    usage = chunk.get("usage") or usage
+                    choices = chunk.get("choices") or []
+                    delta = choices[0].get("delta", {}).get("content") if choices else None
+                    if delta:
+                        if first_token_time is None:
+                            first_token_time = time.perf_counter() - start
+                        parts.append(delta)
+                        yield delta
+        except APIRequestError as e:
+            self._record_request(start, stats, error=e)
+            raise
         except requests.exceptions.RequestException as e:
-            return f"API Request Error: {str(e)}"
+            status_code = e.response.status_code if e.response is not None else None
+            error = APIRequestError(str(e), status_code=status_code)
+            self._record_request(start, stats, error=error)
+            raise error from e
+        finally:
+            # The scheduler slot covers the whole generation, not just the response headers
+            if response is not None and self.scheduler is not None:
+                self.scheduler.release()
+        
+        self._record_request(start, stats, {"usage": usage}, headers=response.headers,
+                             stream=True, first_token_time=first_token_time)
+        if cache_key is not None and parts:
+            self.cache.set(cache_key, {"choices": [{"message": {"role": "assistant", "content": "".join(parts)}}]})
+
+    def ask_many(self,
+                 prompts: Iterable[str],
+                 concurrency: int = 8,
+                 use_tools: bool = True,
+                 max_tokens: Optional[int] = None,
+                 temperature: Optional[float] = None,
+                 progress: Optional[Callable[[int, int, float], None]] = None,
+                 raw: bool = False) -> BatchResults:
+        """
+        Send many prompts concurrently over a thread pool.
+        
+        The tools system prompt is captured once up front and shared by every
+        request. Results come back in input order; a failed prompt gets its own
+        APIRequestError in its slot rather than an error string.
+        
+        Args:
+            prompts: Prompts to send.
+            concurrency: Maximum number of requests in flight.
+            progress: Optional callback called as progress(completed, total, elapsed_seconds).
+            
+        Returns:
+            BatchResults, a list of response strings or APIRequestError objects.
+        """
+        prompts = list(prompts)
+        total = len(prompts)
+        system_prompt = self._tools.get_combined_system_prompt() if use_tools and self._tools else ""
+        tool_names = self._tool_names(self._tools if use_tools else None)
+        params = self._generation_params(self._tools if use_tools else None, max_tokens, temperature)
+        from .checkpoint import record_failure
+        
+        def ask_one(prompt: str):
+            messages = self._build_messages(prompt, use_tools, system_prompt=system_prompt)
+            try:
+                response_data = self.complete(messages, params["max_tokens"], params["temperature"], params.get("stop"))
+                if params.get("choices"):
+                    response_data = self._constrain_choice(messages, response_data, params)
+            except APIRequestError as e:
+                record_failure(e)
+                return e
+            if not response_data.get("choices"):
+                error = APIRequestError("No response content received from API")
+                record_failure(error)
+                return error
+            return self._format_response(response_data, tool_names, raw, params)
+        
+        results = BatchResults([None] * total)
+        start = time.perf_counter()
+        completed = 0
+        
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            futures = {pool.submit(with_request_context(ask_one), prompt): index for index, prompt in enumerate(prompts)}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                completed += 1
+                if progress:
+                    progress(completed, total, time.perf_counter() - start)
+        
+        results.elapsed = time.perf_counter() - start
+        return results
+
+    def _get_semaphore(self) -> "asyncio.Semaphore":
+        """Return the concurrency semaphore for the running event loop"""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def _get_flights(self) -> dict:
+        """Return the aask() requests in flight on the running event loop"""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        if self._flights_loop is not loop:
+            self._flights = {}
+            self._flights_loop = loop
+        return self._flights
+
+    async def aask(self, prompt: str, use_tools: bool = True, max_tokens: Optional[int] = None,
+                   temperature: Optional[float] = None, raise_errors: bool = False, raw: bool = False) -> str:
+        """
+        Async version of ask(), limited to max_concurrency requests in flight.
+        
+        Like ask(), it consults the response and semantic caches, and
+        identical calls in flight on the same event loop share one request.
+        Requests are not hedged, and replies are snapped to the tools'
+        choices but not re-asked.
+        
+        Failures are returned as an error string (an ErrorResponse) unless
+        raise_errors is set, in which case APIRequestError is raised.
+        """
+        client = self.transport.async_client(self.max_concurrency)
+        
+        messages = self._build_messages(prompt, use_tools)
+        system_prompt = messages[0]["content"] if len(messages) > 1 else ""
+        tool_names = self._tool_names(self._tools if use_tools else None)
+        params = self._generation_params(self._tools if use_tools else None, max_tokens, temperature)
+        max_tokens, temperature, stop = params["max_tokens"], params["temperature"], params.get("stop")
+        generation = repr((max_tokens, temperature, stop))
+        start = time.perf_counter()
+        stats = {}
+        
+        if self.semantic_cache is not None:
+            cached = self.semantic_cache.get(self.model, system_prompt, prompt, generation)
+            if cached is not None:
+                self._record_request(start, stats, cached, cache_hit=True, semantic=True)
+                return self._format_response(cached, tool_names, raw, params)
+        
+        cache_key = None
+        if self.cache is not None or self.singleflight is not None:
+            cache_key = ResponseCache.make_key(self.model, messages, max_tokens, temperature, stop)
+        if self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self._record_request(start, stats, cached, cache_hit=True)
+                return self._format_response(cached, tool_names, raw, params)
+        
+        payload = self._build_payload(messages, max_tokens, temperature, stop)
+        
+        try:
+            if self.singleflight is None:
+                response_data = await self._afetch(client, payload, start, stats, cache_key)
+            else:
+                response_data = await self._acoalesce(client, payload, start, stats, cache_key)
+            if self.semantic_cache is not None and response_data.get("choices"):
+                self.semantic_cache.set(self.model, system_prompt, prompt, response_data, generation)
+            return self._format_response(response_data, tool_names, raw, params)
+        
+        except APIRequestError as e:
+            if raise_errors:
+                raise
+            return _error_response(f"API Request Error: {str(e)}", e)
         except Exception as e:
-            return f"Unexpected error: {str(e)}"
+            if raise_errors:
+                raise
+            return _error_response(f"Unexpected error: {str(e)}", e)
 
-    def execute_chain(self, chain_steps: List[Union[dict, Callable]], initial_input: Any = None) -> Any:
+    async def _acoalesce(self, client, payload: dict, start: float, stats: dict, cache_key: str) -> dict:
+        """
+        Async counterpart of complete()'s coalescing: the first caller for a key
+        sends the request and later identical callers on the loop await its result
+        """
+        import asyncio
+        
+        flights = self._get_flights()
+        flight_key = cache_key
+        if self.scheduler is not None:
+            # Only share a request queued at the caller's own priority, never wait behind a lower one
+            flight_key = f"{cache_key}:{current_request_context().get('priority', self.priority)}"
+        
+        future = flights.get(flight_key)
+        if future is None:
+            future = flights[flight_key] = asyncio.get_running_loop().create_future()
+            try:
+                response_data = await self._afetch(client, payload, start, stats, cache_key)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except BaseException as e:
+                future.set_exception(e)
+                future.exception()  # Retrieved here, so a failure nobody waited on isn't logged
+                raise
+            else:
+                future.set_result(response_data)
+                return response_data
+            finally:
+                if flights.get(flight_key) is future:
+                    del flights[flight_key]
+        
+        try:
+            response_data = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+            # The leading call was cancelled, not this one
+            return await self._afetch(client, payload, start, stats, cache_key)
+        except DeadlineExceeded:
+            # The leader's deadline passed while it was queued; this caller's may not have
+            return await self._afetch(client, payload, start, stats, cache_key)
+        except APIRequestError as e:
+            self._record_request(start, stats, error=e, coalesced=True)
+            raise
+        self._record_request(start, stats, response_data, coalesced=True)
+        return response_data
+
+    async def _afetch(self, client, payload: dict, start: float, stats: dict, cache_key: Optional[str]) -> dict:
+        """Send one async request, record it and store the reply in the response cache"""
+        try:
+            async with self._get_semaphore():
+                # Time spent waiting for a semaphore slot counts as queue time
+                stats["queue_time"] = time.perf_counter() - start
+                response = await self._asend(client, payload, stats)
+            try:
+                response_data = response.json()
+            except ValueError as e:
+                raise APIRequestError(f"Invalid JSON in API response: {e}", status_code=response.status_code) from e
+        except APIRequestError as e:
+            self._record_request(start, stats, error=e)
+            raise
+        
+        self._record_request(start, stats, response_data, headers=response.headers)
+        if self.cache is not None and response_data.get("choices"):
+            self.cache.set(cache_key, response_data)
+        return response_data
+
+    async def _asend(self, client, payload: dict, stats: dict):
+        """
+        Async counterpart of _send(), waiting on the scheduler and rate limiter
+        without blocking the loop
+        """
+        import asyncio
+        import httpx
+        
+        attempt = 0
+        while True:
+            if self.scheduler is not None:
+                context = current_request_context()
+                stats["queue_time"] = stats.get("queue_time", 0.0) + await self.scheduler.acquire_async(
+                    context.get("priority", self.priority), context.get("tenant", self.tenant), context.get("deadline")
+                )
+            try:
+                if self.rate_limiter:
+                    delay = self.rate_limiter.reserve(self._estimate_tokens(payload))
+                    stats["queue_time"] = stats.get("queue_time", 0.0) + delay
+                    await asyncio.sleep(delay)
+                
+                stats["attempts"] = attempt + 1
+                sent = time.perf_counter()
+                try:
+                    response = await client.post(self.endpoint, headers=self.headers, json=payload)
+                    response.raise_for_status()
+                    if self.rate_limiter:
+                        self.rate_limiter.on_success()
+                    return response
+                except httpx.HTTPError as e:
+                    failed = getattr(e, "response", None)
+                    status_code = failed.status_code if failed is not None else None
+                    retry_after = parse_retry_after(failed.headers.get("Retry-After")) if failed is not None else None
+                    error = APIRequestError(str(e), status_code=status_code, retry_after=retry_after)
+                    if status_code == 429 and self.rate_limiter:
+                        self.rate_limiter.on_throttle(retry_after)
+                    if not self.retry.should_retry(error, attempt):
+                        raise error from e
+                finally:
+                    stats["network_time"] = stats.get("network_time", 0.0) + time.perf_counter() - sent
+            finally:
+                if self.scheduler is not None:
+                    self.scheduler.release()
+            
+            backoff = self.retry.delay(attempt, error.retry_after)
+            stats["queue_time"] = stats.get("queue_time", 0.0) + backoff
+            await asyncio.sleep(backoff)
+            attempt += 1
+
+    def session(self, **kwargs) -> "ChatSession":
+        """Start a multi-turn conversation with a token-budgeted history (see ChatSession)."""
+        from .session import ChatSession
+        return ChatSession(self, **kwargs)
+
+    def execute_chain(self, chain_steps: List[Union[dict, Callable]], initial_input: Any = None,
+                      checkpoint: Optional["CheckpointStore"] = None) -> Any:
         """Execute a chain of steps, returning the collective result."""
         from .chains import execute_chain
-        return execute_chain(chain_steps, initial_input=initial_input)
+        return execute_chain(chain_steps, initial_input=initial_input, checkpoint=checkpoint)
+
+    def execute_chain_stream(self, chain_steps: List[Union[dict, Callable]], inputs: Iterable[Any], buffer_size: int = 16) -> Iterator[Any]:
+        """Run a chain over many inputs as a pipeline, yielding results lazily."""
+        from .chains import execute_chain_stream
+        return execute_chain_stream(chain_steps, inputs, buffer_size=buffer_size)
+
+    def execute_graph(self, graph_steps: List[dict], initial_input: Any = None, max_parallelism: int = 4) -> Any:
+        """Execute steps as a dependency graph, running independent branches concurrently."""
+        from .chains import execute_graph
+        return execute_graph(graph_steps, initial_input=initial_input, max_parallelism=max_parallelism)
+
+    async def execute_chain_async(self, chain_steps: List[Union[dict, Callable]], initial_input: Any = None) -> Any:
+        """Execute a chain of steps, awaiting any async steps."""
+        from .chains import execute_chain_async
+        return await execute_chain_async(chain_steps, initial_input=initial_input)
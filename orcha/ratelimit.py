@@ -0,0 +1,177 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+from .errors import APIRequestError
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a per-minute rate.
+
+    reserve() always succeeds and returns how long the caller must wait before
+    using what it reserved, so concurrent callers are served in arrival order.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        if per_minute <= 0:
+            raise ValueError("per_minute must be positive")
+        self.per_minute = per_minute
+        self.capacity = capacity or max(per_minute / 60.0, 1.0)
+        self._rate = per_minute / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def set_scale(self, scale: float):
+        """Run the bucket at a fraction of its configured rate"""
+        self._refill()
+        self._rate = self.per_minute * scale / 60.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """Take amount tokens and return the seconds to wait before they are available"""
+        self._refill()
+        self._tokens -= amount
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self._rate
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limiter for one API key.
+
+    In adaptive mode the effective rate is halved after every 429 and raised
+    again gradually after a run of successful requests. A Retry-After from
+    the server pauses every caller sharing the limiter, not just the one
+    that was throttled, for at most max_pause seconds.
+    """
+
+    def __init__(self,
+                 requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None,
+                 adaptive: bool = False,
+                 min_scale: float = 0.1,
+                 recovery_after: int = 20,
+                 max_pause: float = 60.0):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.adaptive = adaptive
+        self.min_scale = min_scale
+        self.recovery_after = recovery_after
+        self.max_pause = max_pause
+
+        self.scale = 1.0
+        self.throttled = 0
+        self._successes = 0
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int = 0) -> float:
+        """Reserve capacity for one request and return the seconds to wait"""
+        with self._lock:
+            delay = max(0.0, self._paused_until - time.monotonic())
+            if self.requests:
+                delay = max(delay, self.requests.reserve(1))
+            if self.tokens and tokens:
+                delay = max(delay, self.tokens.reserve(tokens))
+            return delay
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Block until a request may be sent, returning the time waited"""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        """Record a 429 response"""
+        with self._lock:
+            self.throttled += 1
+            self._successes = 0
+            if retry_after:
+                self._paused_until = max(self._paused_until, time.monotonic() + min(retry_after, self.max_pause))
+            if self.adaptive:
+                self._set_scale(max(self.min_scale, self.scale * 0.5))
+
+    def on_success(self):
+        """Record a successful response"""
+        if not self.adaptive or self.scale >= 1.0:
+            return
+        with self._lock:
+            self._successes += 1
+            if self._successes >= self.recovery_after:
+                self._successes = 0
+                self._set_scale(min(1.0, self.scale * 1.25))
+
+    def _set_scale(self, scale: float):
+        self.scale = scale
+        for bucket in (self.requests, self.tokens):
+            if bucket:
+                bucket.set_scale(scale)
+
+
+class RetryPolicy:
+    """Retry failed requests with jittered exponential backoff.
+
+    Retries rate limiting (429), server errors (5xx) and connection failures.
+    A Retry-After sent by the server takes precedence over the backoff; one
+    longer than max_delay is not waited out, the request fails instead.
+    """
+
+    def __init__(self,
+                 max_retries: int = 3,
+                 base_delay: float = 0.5,
+                 max_delay: float = 30.0,
+                 retry_statuses: tuple = (429, 500, 502, 503, 504)):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = retry_statuses
+
+    def should_retry(self, error: APIRequestError, attempt: int) -> bool:
+        """Whether the request that failed on this attempt (0-based) should be retried"""
+        if attempt >= self.max_retries:
+            return False
+        if error.retry_after is not None and error.retry_after > self.max_delay:
+            return False
+        return error.status_code is None or error.status_code in self.retry_statuses
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before the next attempt ("full jitter" backoff)"""
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(api_key: str, **kwargs) -> RateLimiter:
+    """
+    Return the rate limiter shared by every model using api_key.
+    The keyword arguments configure the limiter the first time it is created.
+    """
+    with _limiters_lock:
+        if api_key not in _limiters:
+            _limiters[api_key] = RateLimiter(**kwargs)
+        return _limiters[api_key]
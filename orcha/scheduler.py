@@ -0,0 +1,276 @@
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from .errors import DeadlineExceeded
+from .metrics import Histogram
+
+# Lower runs first; requests of a lower class always go before a higher one
+PRIORITIES = {"interactive": 0, "default": 1, "batch": 2}
+
+_request_context: contextvars.ContextVar = contextvars.ContextVar("orcha_request_context", default=None)
+
+
+@contextmanager
+def request_context(priority: Optional[str] = None,
+                    tenant: Optional[str] = None,
+                    deadline: Optional[float] = None):
+    """
+    Tag every model request made inside the block for the scheduler.
+
+    Args:
+        priority: "interactive", "default" or "batch".
+        tenant: Name to share capacity fairly by, such as a chain run or user.
+        deadline: Seconds from now after which the request is no longer useful.
+
+    Example:
+        with request_context(priority="interactive", deadline=10):
+            model.ask("Quick question")
+    """
+    if priority is not None and priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority '{priority}', expected one of {', '.join(PRIORITIES)}")
+    context = dict(_request_context.get() or {})
+    if priority is not None:
+        context["priority"] = priority
+    if tenant is not None:
+        context["tenant"] = tenant
+    if deadline is not None:
+        context["deadline"] = time.monotonic() + deadline
+    token = _request_context.set(context)
+    try:
+        yield context
+    finally:
+        _request_context.reset(token)
+
+
+def current_request_context() -> Dict[str, Any]:
+    """Priority, tenant and deadline set by the innermost request_context()"""
+    return _request_context.get() or {}
+
+
+def with_request_context(func: Callable) -> Callable:
+    """Wrap func to run in a copy of the caller's request context, e.g. on a pool thread"""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(func, *args, **kwargs)
+
+
+class _Waiter:
+    __slots__ = ("priority", "tenant", "deadline", "start_tag", "event", "cancelled", "error", "demoted", "notify")
+
+    def __init__(self, priority: int, tenant: str, deadline: Optional[float]):
+        self.priority = priority
+        self.tenant = tenant
+        self.deadline = deadline
+        self.start_tag = 0.0
+        self.event = threading.Event()
+        self.cancelled = False
+        self.error = None
+        self.demoted = False
+        # Called after event is set, to wake an acquire_async() on its event loop
+        self.notify = None
+
+    def wake(self):
+        self.event.set()
+        if self.notify is not None:
+            self.notify()
+
+
+class RequestScheduler:
+    """
+    Central admission queue for model requests.
+
+    At most max_in_flight requests are sent at once; the rest wait and are
+    released in order of:
+      1. priority class (interactive, then default, then batch)
+      2. weighted fair queuing between tenants within a class, so one large
+         run cannot starve the others (tenant_weights gives some tenants a
+         bigger share; the default weight is 1)
+
+    A request whose deadline passes while it waits is dropped with
+    DeadlineExceeded, or with on_deadline="deprioritize" moved behind all
+    other requests instead.
+
+    Share one scheduler between models that use the same API key, as with
+    the rate limiter.
+    """
+
+    def __init__(self,
+                 max_in_flight: int = 8,
+                 tenant_weights: Optional[Dict[str, float]] = None,
+                 on_deadline: str = "drop"):
+        if on_deadline not in ("drop", "deprioritize"):
+            raise ValueError("on_deadline must be 'drop' or 'deprioritize'")
+        self.max_in_flight = max_in_flight
+        self.tenant_weights = dict(tenant_weights or {})
+        self.on_deadline = on_deadline
+        self.in_flight = 0
+        self.granted = 0
+        self.dropped = 0
+        self.deprioritized = 0
+        self.wait_times = {name: Histogram(max_samples=1000) for name in PRIORITIES}
+        self._depth = {rank: 0 for rank in PRIORITIES.values()}
+        self._names = {rank: name for name, rank in PRIORITIES.items()}
+        self._heap = []
+        self._sequence = itertools.count()
+        self._virtual_time = 0.0
+        self._tenant_finish: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _enqueue(self, waiter: _Waiter):
+        # Start-time fair queuing: each tenant's requests are spaced 1/weight apart in virtual time
+        start = max(self._virtual_time, self._tenant_finish.get(waiter.tenant, 0.0))
+        waiter.start_tag = start
+        self._tenant_finish[waiter.tenant] = start + 1.0 / self.tenant_weights.get(waiter.tenant, 1.0)
+        heapq.heappush(self._heap, (waiter.priority, start, next(self._sequence), waiter))
+        self._depth[min(waiter.priority, len(PRIORITIES) - 1)] += 1
+
+    def _dispatch(self):
+        """Grant free slots to the best waiting requests; called with the lock held"""
+        now = time.monotonic()
+        while self._heap and self.in_flight < self.max_in_flight:
+            _, _, _, waiter = heapq.heappop(self._heap)
+            if waiter.cancelled:
+                continue
+            self._depth[min(waiter.priority, len(PRIORITIES) - 1)] -= 1
+            if waiter.deadline is not None and waiter.deadline < now:
+                if self.on_deadline == "drop":
+                    waiter.error = DeadlineExceeded("Request deadline passed while queued")
+                    self.dropped += 1
+                    waiter.wake()
+                    continue
+                if not waiter.demoted:
+                    waiter.demoted = True
+                    waiter.priority = len(PRIORITIES)
+                    self.deprioritized += 1
+                    self._enqueue(waiter)
+                    continue
+            self._virtual_time = max(self._virtual_time, waiter.start_tag)
+            self.in_flight += 1
+            self.granted += 1
+            waiter.wake()
+
+    def acquire(self, priority: str = "default", tenant: str = "default", deadline: Optional[float] = None) -> float:
+        """
+        Wait for a slot. deadline is an absolute time.monotonic() value.
+        Returns the seconds spent waiting; raises DeadlineExceeded if dropped.
+        """
+        rank = PRIORITIES.get(priority, PRIORITIES["default"])
+        waiter = _Waiter(rank, tenant, deadline)
+        start = time.monotonic()
+        with self._lock:
+            self._enqueue(waiter)
+            self._dispatch()
+
+        if not waiter.event.is_set():
+            timeout = None
+            if deadline is not None and self.on_deadline == "drop":
+                timeout = max(0.0, deadline - time.monotonic())
+            if not waiter.event.wait(timeout):
+                with self._lock:
+                    if not waiter.event.is_set():
+                        # Left in the heap and skipped when it reaches the top
+                        waiter.cancelled = True
+                        self._depth[min(waiter.priority, len(PRIORITIES) - 1)] -= 1
+                        self.dropped += 1
+                        raise DeadlineExceeded("Request deadline passed while queued")
+
+        if waiter.error is not None:
+            raise waiter.error
+        waited = time.monotonic() - start
+        self.wait_times[priority if priority in PRIORITIES else "default"].observe(waited)
+        return waited
+
+    async def acquire_async(self, priority: str = "default", tenant: str = "default",
+                            deadline: Optional[float] = None) -> float:
+        """Async version of acquire() that waits without blocking the event loop"""
+        import asyncio
+        
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+        
+        def resolve():
+            if not granted.done():
+                granted.set_result(None)
+        
+        def notify():
+            try:
+                loop.call_soon_threadsafe(resolve)
+            except RuntimeError:
+                pass  # Loop already closed; the waiter is gone
+        
+        rank = PRIORITIES.get(priority, PRIORITIES["default"])
+        waiter = _Waiter(rank, tenant, deadline)
+        waiter.notify = notify
+        start = time.monotonic()
+        with self._lock:
+            self._enqueue(waiter)
+            self._dispatch()
+        
+        if not waiter.event.is_set():
+            timeout = None
+            if deadline is not None and self.on_deadline == "drop":
+                timeout = max(0.0, deadline - time.monotonic())
+            try:
+                await asyncio.wait_for(asyncio.shield(granted), timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                with self._lock:
+                    if not waiter.event.is_set():
+                        waiter.cancelled = True
+                        self._depth[min(waiter.priority, len(PRIORITIES) - 1)] -= 1
+                        if isinstance(e, asyncio.TimeoutError):
+                            self.dropped += 1
+                            raise DeadlineExceeded("Request deadline passed while queued")
+                    elif waiter.error is None:
+                        # Granted just as the task was cancelled; hand the slot on
+                        self.in_flight -= 1
+                        self._dispatch()
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+        
+        if waiter.error is not None:
+            raise waiter.error
+        waited = time.monotonic() - start
+        self.wait_times[priority if priority in PRIORITIES else "default"].observe(waited)
+        return waited
+
+    def resize(self, max_in_flight: int):
+        """Change the number of requests allowed in flight, admitting waiters if it grew"""
+        with self._lock:
+            self.max_in_flight = max_in_flight
+            self._dispatch()
+
+    def release(self):
+        """Free a slot taken with acquire()"""
+        with self._lock:
+            self.in_flight -= 1
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, priority: str = "default", tenant: str = "default", deadline: Optional[float] = None):
+        """Hold a slot for the duration of the block; yields the seconds spent waiting"""
+        waited = self.acquire(priority, tenant, deadline)
+        try:
+            yield waited
+        finally:
+            self.release()
+
+    def queue_depth(self) -> Dict[str, int]:
+        """Requests waiting per priority class (deprioritized ones count as batch)"""
+        with self._lock:
+            return {self._names[rank]: count for rank, count in self._depth.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, in-flight count, counters and wait-time percentiles per class"""
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": self.queue_depth(),
+            "granted": self.granted,
+            "dropped": self.dropped,
+            "deprioritized": self.deprioritized,
+            "wait_time": {name: histogram.summary() for name, histogram in self.wait_times.items()},
+        }
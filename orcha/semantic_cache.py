@@ -0,0 +1,218 @@
+import re
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+_WORD = re.compile(r"\w+")
+
+# Words that flip a prompt's meaning while barely changing its n-grams ("t" is what's left of "n't")
+_NEGATIONS = frozenset({"not", "no", "never", "none", "nor", "without", "cannot", "t"})
+
+# Scopes up to this size are scanned in full; larger ones are searched through LSH buckets
+_FULL_SCAN_LIMIT = 2048
+
+
+def _load_numpy():
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("Semantic caching requires numpy: pip install numpy") from e
+    return numpy
+
+
+def normalize_prompt(text: str) -> str:
+    """Lowercase and keep only words, so whitespace, casing and punctuation don't matter"""
+    return " ".join(_WORD.findall(text.lower()))
+
+
+def _critical_terms(normalized: str) -> Tuple[str, ...]:
+    """Numbers and negations, which a near-duplicate must share exactly"""
+    return tuple(word for word in normalized.split() if word.isdigit() or word in _NEGATIONS)
+
+
+class _Scope:
+    """Vectors and responses for one (model, system prompt) pair"""
+
+    def __init__(self, np, capacity: int, dim: int):
+        self.vectors = np.zeros((min(capacity, 1024), dim), dtype=np.float32)
+        self.last_used = np.zeros(len(self.vectors), dtype=np.float64)
+        self.responses = []
+        self.texts = []
+        self.codes = []
+        self.exact = {}
+        self.buckets = None
+
+    def __len__(self):
+        return len(self.responses)
+
+
+class SemanticCache:
+    """
+    In-memory cache that also matches near-duplicate prompts.
+
+    Prompts are embedded locally as signed, hashed character n-gram counts
+    (no model or network call) and compared by cosine similarity with one
+    matrix-vector product. A lookup first tries the normalized text as an
+    exact key, then falls back to the nearest stored vector, returning its
+    response when the similarity is at least threshold and both prompts
+    contain the same numbers and negations ("2023" vs "2024", "is" vs "is
+    not" change the answer while barely moving the vector).
+
+    Large scopes are not scanned in full: every vector is also filed under
+    random-hyperplane (LSH) signatures in several hash tables, and only
+    vectors sharing a bucket with the query are scored. This keeps lookups
+    well under a millisecond at 100k entries, at the cost of occasionally
+    missing a match just above the threshold.
+
+    Entries are scoped by model name, system prompt and generation settings,
+    so different tools or token limits never share answers. Each scope holds
+    at most capacity entries; when full, the least recently used entry is
+    overwritten.
+
+    Requires numpy.
+    """
+
+    def __init__(self, threshold: float = 0.97, capacity: int = 10000, dim: int = 256, ngram: int = 3,
+                 tables: int = 20, bits: int = 12):
+        self.np = _load_numpy()
+        self.threshold = threshold
+        self.capacity = capacity
+        self.dim = dim
+        self.ngram = ngram
+        self.tables = tables
+        self.bits = bits
+        self._planes = self.np.random.default_rng(0).standard_normal((tables * bits, dim)).astype(self.np.float32)
+        self._bit_weights = 1 << self.np.arange(bits, dtype=self.np.int64)
+        self.hits = 0
+        self.misses = 0
+        self._scopes: Dict[Tuple[str, str, str], _Scope] = {}
+        self._lock = threading.Lock()
+
+    def embed(self, normalized: str):
+        """Unit-length hashed n-gram vector for already normalized text"""
+        np = self.np
+        padded = f" {normalized} "
+        n = self.ngram
+        hashes = np.fromiter(
+            (zlib.crc32(padded[i:i + n].encode("utf-8")) for i in range(max(1, len(padded) - n + 1))),
+            dtype=np.uint32
+        )
+        # The top hash bit picks a sign so unrelated collisions tend to cancel out
+        signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+        vector = np.bincount(hashes % self.dim, weights=signs, minlength=self.dim).astype(np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def _signature(self, vector) -> list:
+        """One LSH bucket code per hash table"""
+        bits = (self._planes @ vector > 0).reshape(self.tables, self.bits)
+        return (bits * self._bit_weights).sum(axis=1).tolist()
+
+    def _search(self, scope: _Scope, vector) -> Optional[int]:
+        """Index of the most similar stored vector at or above the threshold"""
+        np = self.np
+        if len(scope) <= _FULL_SCAN_LIMIT:
+            similarities = scope.vectors[:len(scope)] @ vector
+            best = int(similarities.argmax())
+            return best if similarities[best] >= self.threshold else None
+
+        candidates = set()
+        for table, code in zip(scope.buckets, self._signature(vector)):
+            bucket = table.get(code)
+            if bucket:
+                candidates |= bucket
+        if not candidates:
+            return None
+        indexes = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        similarities = scope.vectors[indexes] @ vector
+        best = int(similarities.argmax())
+        return int(indexes[best]) if similarities[best] >= self.threshold else None
+
+    def get(self, model: str, system_prompt: str, prompt: str, generation: str = "") -> Optional[Any]:
+        """
+        Cached response for prompt or a near-duplicate of it, or None.
+        generation identifies the settings the response was made with, such as max_tokens.
+        """
+        normalized = normalize_prompt(prompt)
+        with self._lock:
+            scope = self._scopes.get((model, system_prompt or "", generation))
+            if scope is None or not len(scope):
+                self.misses += 1
+                return None
+
+            index = scope.exact.get(normalized)
+            if index is None:
+                index = self._search(scope, self.embed(normalized))
+                if index is not None and _critical_terms(scope.texts[index]) != _critical_terms(normalized):
+                    index = None
+
+            if index is None:
+                self.misses += 1
+                return None
+            scope.last_used[index] = time.monotonic()
+            self.hits += 1
+            return scope.responses[index]
+
+    def set(self, model: str, system_prompt: str, prompt: str, response: Any, generation: str = ""):
+        """Store the response for prompt"""
+        np = self.np
+        normalized = normalize_prompt(prompt)
+        vector = self.embed(normalized)
+        codes = self._signature(vector)
+        with self._lock:
+            key = (model, system_prompt or "", generation)
+            scope = self._scopes.get(key)
+            if scope is None:
+                scope = self._scopes[key] = _Scope(np, self.capacity, self.dim)
+                scope.buckets = [{} for _ in range(self.tables)]
+
+            index = scope.exact.get(normalized)
+            if index is None:
+                if len(scope) < self.capacity:
+                    index = len(scope)
+                    if index == len(scope.vectors):
+                        # Grow the matrix geometrically up to capacity
+                        size = min(self.capacity, len(scope.vectors) * 2)
+                        scope.vectors = np.resize(scope.vectors, (size, self.dim))
+                        scope.last_used = np.resize(scope.last_used, size)
+                    scope.responses.append(None)
+                    scope.texts.append(None)
+                    scope.codes.append(None)
+                else:
+                    index = int(scope.last_used.argmin())
+                    del scope.exact[scope.texts[index]]
+            # Refile the row under its new signature
+            if scope.codes[index] is not None:
+                for table, code in zip(scope.buckets, scope.codes[index]):
+                    table[code].discard(index)
+            for table, code in zip(scope.buckets, codes):
+                table.setdefault(code, set()).add(index)
+
+            scope.vectors[index] = vector
+            scope.last_used[index] = time.monotonic()
+            scope.responses[index] = response
+            scope.texts[index] = normalized
+            scope.codes[index] = codes
+            scope.exact[normalized] = index
+
+    def clear(self):
+        """Remove every entry"""
+        with self._lock:
+            self._scopes.clear()
+
+    def __len__(self):
+        return sum(len(scope) for scope in self._scopes.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry and scope counts and hit/miss counters"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "scopes": len(self._scopes),
+            "capacity_per_scope": self.capacity,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,219 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class ChainCache:
+    """Parsed YAML chains kept in memory, reloaded when the file changes on disk"""
+
+    def __init__(self):
+        self._chains: Dict[str, Tuple[Tuple[float, int], dict]] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def get(self, path: str) -> dict:
+        """Return the parsed chain at path, re-reading it only if its mtime or size changed"""
+        import yaml
+
+        stat = os.stat(path)
+        signature = (stat.st_mtime, stat.st_size)
+        with self._lock:
+            cached = self._chains.get(path)
+            if cached and cached[0] == signature:
+                return cached[1]
+
+        with open(path, 'r') as f:
+            chain_data = yaml.safe_load(f) or {}
+
+        with self._lock:
+            self._chains[path] = (signature, chain_data)
+            self.loads += 1
+        return chain_data
+
+    def __len__(self):
+        return len(self._chains)
+
+
+class OrchaServer(ThreadingHTTPServer):
+    """
+    Long-running HTTP server that keeps models, connection pools and parsed
+    chains warm between requests.
+
+    Endpoints (JSON in, JSON out):
+      GET  /health  server status
+      POST /prompt  {"text", "model", "max_tokens", "temperature", "sentiment", "topic", "personality"}
+      POST /chain   {"file", "input", "model", "max_parallelism"}
+
+    Both POST endpoints also accept "priority", "tenant" and "deadline"
+    (seconds) for the request scheduler; prompts default to interactive.
+    """
+
+    daemon_threads = True
+
+    def __init__(self,
+                 address: Tuple[str, int],
+                 get_model: Callable[[str], Any],
+                 chains_dir: str = "."):
+        super().__init__(address, _Handler)
+        self.get_model = get_model
+        self.chains_dir = os.path.abspath(chains_dir)
+        self.chains = ChainCache()
+        self.started = time.time()
+        self.requests = 0
+        self._model_lock = threading.Lock()
+
+    def model(self, name: str):
+        # Model creation touches the shared registry; requests themselves run concurrently
+        with self._model_lock:
+            return self.get_model(name)
+
+    def resolve_chain(self, file: str) -> str:
+        """Resolve a chain path inside chains_dir, refusing paths that escape it"""
+        path = os.path.abspath(os.path.join(self.chains_dir, file))
+        if os.path.commonpath([path, self.chains_dir]) != self.chains_dir:
+            raise PermissionError(f"Chain file must be inside {self.chains_dir}")
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Chain file '{file}' not found")
+        return path
+
+    def run_prompt(self, body: dict) -> dict:
+        from .models import reply_text
+        from .tools import AITools
+
+        text = body.get("text")
+        if not isinstance(text, str) or not text:
+            raise ValueError("'text' is required")
+        model = self.model(body.get("model", "default"))
+
+        # Tools are configured per request so concurrent prompts don't share state
+        tools = AITools(model)
+        if body.get("sentiment"):
+            tools.prediction(task_type="sentiment", categories=["positive", "negative", "neutral"],
+                             output_format="simple")
+        elif body.get("topic"):
+            tools.prediction(task_type="topic",
+                             categories=["technology", "business", "science", "entertainment", "other"],
+                             output_format="simple")
+        elif body.get("personality"):
+            tools.chatbot(personality=body["personality"])
+
+        # Same path as model.ask(): semantic cache, choice snapping and re-asking
+        response_data, params = model.generate(text, tools, body.get("max_tokens"), body.get("temperature"))
+        return {
+            "response": reply_text(response_data, params),
+            "usage": response_data.get("usage"),
+        }
+
+    def run_chain(self, body: dict) -> dict:
+        file = body.get("file")
+        if not file:
+            raise ValueError("'file' is required")
+        chain_data = self.chains.get(self.resolve_chain(file))
+        model = self.model(body.get("model", "default"))
+        initial_input = body.get("input", chain_data.get("initial_input"))
+
+        graph = chain_data.get("graph", [])
+        if graph:
+            parallelism = body.get("max_parallelism") or chain_data.get("max_parallelism", 4)
+            result = model.execute_graph(graph, initial_input, max_parallelism=parallelism)
+        else:
+            result = model.execute_chain(chain_data.get("steps", []), initial_input)
+        return {"result": result}
+
+    def health(self) -> dict:
+        return {
+            "status": "ok",
+            "uptime": time.time() - self.started,
+            "requests": self.requests,
+            "cached_chains": len(self.chains),
+            "chain_loads": self.chains.loads,
+            "scheduler": self.scheduler_stats(),
+        }
+
+    def scheduler_stats(self) -> Optional[dict]:
+        """Stats of the scheduler shared by the served models, if any"""
+        scheduler = getattr(self.model("default"), "scheduler", None)
+        return scheduler.stats() if scheduler is not None else None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: OrchaServer
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not isinstance(body, dict):
+            raise ValueError("Request body must be a JSON object")
+        return body
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, self.server.health())
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint {self.path}"})
+
+    def do_POST(self):
+        from .errors import APIRequestError, DeadlineExceeded
+        from .scheduler import request_context
+
+        routes = {"/prompt": (self.server.run_prompt, "interactive"), "/chain": (self.server.run_chain, "default")}
+        route, priority = routes.get(self.path, (None, None))
+        if route is None:
+            self._send_json(404, {"error": f"Unknown endpoint {self.path}"})
+            return
+
+        self.server.requests += 1
+        start = time.perf_counter()
+        try:
+            body = self._read_json()
+            with request_context(priority=body.get("priority", priority), tenant=body.get("tenant"),
+                                 deadline=body.get("deadline")):
+                result = route(body)
+        except (ValueError, TypeError) as e:
+            self._send_json(400, {"error": str(e)})
+        except PermissionError as e:
+            self._send_json(403, {"error": str(e)})
+        except FileNotFoundError as e:
+            self._send_json(404, {"error": str(e)})
+        except DeadlineExceeded as e:
+            self._send_json(504, {"error": str(e)})
+        except APIRequestError as e:
+            self._send_json(502, {"error": str(e), "status_code": e.status_code})
+        except Exception as e:
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+        else:
+            result["elapsed"] = time.perf_counter() - start
+            self._send_json(200, result)
+
+
+def serve(get_model: Callable[[str], Any],
+          host: str = "127.0.0.1",
+          port: int = 8700,
+          chains_dir: str = ".",
+          on_ready: Optional[Callable[[OrchaServer], None]] = None):
+    """Run an OrchaServer until interrupted"""
+    server = OrchaServer((host, port), get_model, chains_dir=chains_dir)
+    if on_ready:
+        on_ready(server)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
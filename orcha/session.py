@@ -0,0 +1,160 @@
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from .errors import APIRequestError
+from .tokens import MESSAGE_OVERHEAD, estimate_message_tokens, estimate_tokens
+
+_SUMMARY_PROMPT = (
+    "You keep a running summary of a conversation. Merge the new turns into the "
+    "existing summary. Keep names, facts, decisions and open questions; drop "
+    "pleasantries. Reply with the updated summary only, in under {words} words."
+)
+
+
+class ChatSession:
+    """
+    Multi-turn conversation on top of a model with a bounded context window.
+
+    History is kept as (role, content, tokens) tuples with a running token
+    total. Before each request the oldest user/assistant pairs are dropped
+    until the system prompt, history and new message fit in
+    max_context_tokens, so request size stays flat however long the
+    conversation runs. With summarize set, dropped turns are folded into a
+    short running summary: each fold only sends the previous summary and the
+    turns being dropped, never the whole conversation.
+
+    Example:
+        session = model.session(max_context_tokens=2000, summarize=True)
+        session.send("Hi, I'm planning a trip to Japan")
+        session.send("What did I say I was planning?")
+    """
+
+    def __init__(self,
+                 model,
+                 system_prompt: Optional[str] = None,
+                 max_context_tokens: int = 3000,
+                 max_tokens: int = 500,
+                 temperature: float = 0.7,
+                 summarize: bool = False,
+                 summary_tokens: int = 200):
+        self.model = model
+        # None means use the model's active tools, re-read on every turn
+        self.system_prompt = system_prompt
+        self.max_context_tokens = max_context_tokens
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.summarize = summarize
+        self.summary_tokens = summary_tokens
+        self.summary = ""
+        self.history = deque()
+        self.history_tokens = 0
+        self.turns = 0
+        self.dropped_turns = 0
+        self.summaries = 0
+        self.last_prompt_tokens = 0
+
+    def _system_content(self) -> str:
+        """System prompt plus the running summary, if any"""
+        system_prompt = self.system_prompt
+        if system_prompt is None:
+            tools = getattr(self.model, "_tools", None)
+            system_prompt = tools.get_combined_system_prompt() if tools and tools.system_prompts else ""
+        if self.summary:
+            summary = f"Summary of the earlier conversation:\n{self.summary}"
+            return f"{system_prompt}\n\n{summary}" if system_prompt else summary
+        return system_prompt
+
+    def _fit(self, fixed_tokens: int):
+        """Drop the oldest turns until fixed_tokens plus history fits the budget"""
+        # Leave room for the summary to grow back after a fold
+        reserve = self.summary_tokens if self.summarize else 0
+        evicted = []
+        while self.history and fixed_tokens + reserve + self.history_tokens > self.max_context_tokens:
+            # Drop whole user/assistant pairs so the history still starts with a user turn
+            for _ in range(2):
+                if self.history:
+                    turn = self.history.popleft()
+                    self.history_tokens -= turn[2]
+                    evicted.append(turn)
+
+        if evicted:
+            self.dropped_turns += len(evicted)
+            if self.summarize:
+                self._fold(evicted)
+
+    def _fold(self, evicted: List[tuple]):
+        """Merge dropped turns into the running summary"""
+        transcript = "\n".join(f"{role.capitalize()}: {content}" for role, content, _ in evicted)
+        messages = [
+            {"role": "system", "content": _SUMMARY_PROMPT.format(words=max(20, self.summary_tokens * 3 // 4))},
+            {"role": "user", "content": f"Existing summary:\n{self.summary or '(none)'}\n\nNew turns:\n{transcript}"},
+        ]
+        try:
+            response_data = self.model.complete(messages, max_tokens=self.summary_tokens, temperature=0)
+        except APIRequestError:
+            # Keep the old summary; the dropped turns are simply forgotten
+            return
+        choices = response_data.get("choices") or []
+        if choices:
+            self.summary = choices[0]["message"]["content"].strip()
+            self.summaries += 1
+
+    def messages(self, prompt: str) -> List[Dict[str, str]]:
+        """Message list that would be sent for prompt with the current history"""
+        messages = []
+        system_content = self._system_content()
+        if system_content:
+            messages.append({"role": "system", "content": system_content})
+        messages.extend({"role": role, "content": content} for role, content, _ in self.history)
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    def send(self, prompt: str) -> str:
+        """
+        Send the next user message and return the assistant's reply.
+        Raises APIRequestError on failure; history is left unchanged.
+        """
+        prompt_tokens = estimate_tokens(prompt) + MESSAGE_OVERHEAD
+        system_tokens = estimate_tokens(self._system_content()) + MESSAGE_OVERHEAD
+        self._fit(system_tokens + prompt_tokens)
+
+        messages = self.messages(prompt)
+        self.last_prompt_tokens = estimate_message_tokens(messages)
+        response_data = self.model.complete(messages, max_tokens=self.max_tokens, temperature=self.temperature)
+
+        choices = response_data.get("choices") or []
+        if not choices:
+            raise APIRequestError("No response content received from API")
+        reply = choices[0]["message"]["content"]
+
+        self._append("user", prompt, prompt_tokens)
+        self._append("assistant", reply, estimate_tokens(reply) + MESSAGE_OVERHEAD)
+        self.turns += 1
+        return reply
+
+    def _append(self, role: str, content: str, tokens: int):
+        self.history.append((role, content, tokens))
+        self.history_tokens += tokens
+
+    def reset(self):
+        """Forget the conversation, keeping the settings"""
+        self.history.clear()
+        self.history_tokens = 0
+        self.summary = ""
+        self.turns = 0
+        self.dropped_turns = 0
+        self.summaries = 0
+        self.last_prompt_tokens = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Turn counts and current context size"""
+        return {
+            "turns": self.turns,
+            "history_messages": len(self.history),
+            "history_tokens": self.history_tokens,
+            "dropped_messages": self.dropped_turns,
+            "summaries": self.summaries,
+            "summary_tokens": estimate_tokens(self.summary),
+            "last_prompt_tokens": self.last_prompt_tokens,
+            "max_context_tokens": self.max_context_tokens,
+        }
@@ -0,0 +1,24 @@
+import re
+from typing import List
+
+# Words and individual punctuation marks; roughly how BPE tokenizers split English text
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Chat APIs add a few tokens of framing around every message
+MESSAGE_OVERHEAD = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Fast local estimate of how many tokens text will use.
+    Takes the larger of the word/punctuation count and one token per four
+    characters, which keeps long words and code from being undercounted.
+    """
+    if not text:
+        return 0
+    return max(len(_TOKEN_PATTERN.findall(text)), (len(text) + 3) // 4)
+
+
+def estimate_message_tokens(messages: List[dict]) -> int:
+    """Estimated prompt tokens for a chat completions message list"""
+    return sum(estimate_tokens(message.get("content") or "") + MESSAGE_OVERHEAD for message in messages) + 2
@@ -1,4 +1,9 @@
-from typing import List, Dict, Any, Optional
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterable, Optional
+
+_SPACES = re.compile(r"[ \t]+")
 
 class AITools:
     """Collection of AI tools and capabilities for LLM models"""
@@ -7,6 +12,11 @@ class AITools:
         self.model = model
         self.system_prompts = {}
         self.active_tools = []
+        self.generation = {}
+        # (system_prompts snapshot, compacted prompt); rebuilt when the tools change
+        self._compacted = None
+        # Caller-supplied values per tool, which compaction leaves untouched
+        self.user_fields = {}
     
     def chatbot(self, 
                 personality: str = "helpful and friendly", 
@@ -32,6 +42,7 @@ Instructions:
 """
         
         self.system_prompts['chatbot'] = system_prompt
+        self.user_fields['chatbot'] = [personality, context, conversation_style, expertise]
         if 'chatbot' not in self.active_tools:
             self.active_tools.append('chatbot')
         
@@ -41,14 +52,31 @@ Instructions:
                    task_type: str = "classification",
                    categories: List[str] = None,
                    output_format: str = "json",
-                   confidence_scores: bool = True):
-        """Configure for prediction tasks like classification, sentiment analysis, etc."""
+                   confidence_scores: bool = True,
+                   max_tokens: Optional[int] = None,
+                   temperature: Optional[float] = 0.0,
+                   stop: Optional[List[str]] = None):
+        """
+        Configure for prediction tasks like classification, sentiment analysis, etc.
+        
+        Predictions are short, so ask() applies tight generation settings while
+        this tool is active: temperature 0 and a max_tokens cap sized to the
+        expected answer (derived from the categories unless given). With
+        output_format="simple" the reply is also validated against categories.
+        stop sequences are sent with the request and cut off client-side.
+        """
         
         if categories is None:
             categories = ["positive", "negative", "neutral"]
         
         categories_str = ", ".join(categories)
         
+        def format_instruction(json_example: str, answer: str) -> str:
+            # Only the instruction for the requested format is sent
+            if output_format.lower() == "simple":
+                return f"Just return the {answer}"
+            return f"Format as: {json_example}"
+        
         if task_type.lower() == "classification":
             system_prompt = f"""You are a text classification model.
 
@@ -60,8 +88,7 @@ Include Confidence: {confidence_scores}
 Instructions:
 - Analyze the input text carefully
 - Choose the most appropriate category from: {categories_str}
-- If output_format is 'json', format as: {{"category": "chosen_category", "confidence": 0.95}}
-- If output_format is 'simple', just return the category name
+- {format_instruction('{"category": "chosen_category", "confidence": 0.95}', 'category name')}
 - Be precise and consistent in your classifications
 """
         
@@ -77,8 +104,7 @@ Instructions:
 - Determine the overall emotional tone of the text
 - Choose from: {categories_str}
 - Consider context, tone, and emotional indicators
-- If output_format is 'json', format as: {{"sentiment": "category", "confidence": 0.95}}
-- If output_format is 'simple', just return the sentiment
+- {format_instruction('{"sentiment": "category", "confidence": 0.95}', 'sentiment')}
 """
         
         elif task_type.lower() == "topic":
@@ -93,8 +119,7 @@ Instructions:
 - Identify the primary subject or theme
 - Choose the most relevant topic from: {categories_str}
 - Focus on the main content, not minor details
-- If output_format is 'json', format as: {{"topic": "category", "confidence": 0.95}}
-- If output_format is 'simple', just return the topic name
+- {format_instruction('{"topic": "category", "confidence": 0.95}', 'topic name')}
 """
         
         else:
@@ -111,25 +136,275 @@ Instructions:
 """
         
         self.system_prompts['prediction'] = system_prompt
+        self.user_fields['prediction'] = [task_type, categories_str]
         if 'prediction' not in self.active_tools:
             self.active_tools.append('prediction')
         
+        if max_tokens is None:
+            max_tokens = self._prediction_budget(task_type, categories, output_format)
+        self.generation['prediction'] = {
+            key: value for key, value in {
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+                "stop": list(stop) if stop else None,
+                "choices": list(categories) if output_format.lower() == "simple" else None,
+            }.items() if value is not None
+        }
+        
         return self
     
+    def _prediction_budget(self, task_type: str, categories: List[str], output_format: str) -> Optional[int]:
+        """max_tokens that fits the expected answer, or None for free-form task types"""
+        from .tokens import estimate_tokens
+        
+        longest = max(categories, key=len)
+        if output_format.lower() == "simple":
+            return estimate_tokens(longest) + 4
+        key = {"classification": "category", "sentiment": "sentiment", "topic": "topic"}.get(task_type.lower())
+        if key is None:
+            return None
+        # Room for the JSON object plus a little slack for whitespace or a code fence
+        return estimate_tokens(json.dumps({key: longest, "confidence": 0.95})) + 12
+    
+    def get_generation_params(self) -> Dict[str, Any]:
+        """
+        Generation settings implied by the active tools.
+        
+        A setting applies only if every active tool sets it, so a chatbot
+        alongside a prediction keeps the caller's defaults. Caps take the
+        loosest value across tools and choices apply to a single tool only.
+        """
+        params = [self.generation.get(tool, {}) for tool in self.active_tools]
+        if not params:
+            return {}
+        
+        merged = {}
+        for key in ("max_tokens", "temperature"):
+            values = [p[key] for p in params if key in p]
+            if len(values) == len(params):
+                merged[key] = max(values)
+        if all(p.get("stop") for p in params):
+            merged["stop"] = sorted({sequence for p in params for sequence in p["stop"]})
+        if len(params) == 1 and params[0].get("choices"):
+            merged["choices"] = params[0]["choices"]
+        return merged
+    
+    def classify_batch(self,
+                       texts: List[str],
+                       task_type: str = "sentiment",
+                       categories: List[str] = None,
+                       batch_size: int = 50,
+                       max_tokens: int = 1000,
+                       max_attempts: int = 3,
+                       concurrency: int = 4) -> List[Optional[str]]:
+        """
+        Classify many texts by packing them into a few requests.
+        
+        Each request carries up to batch_size indexed items and asks for a JSON
+        array of {"index": ..., "label": ...} answers. Replies are validated
+        against categories; items that are missing or malformed are re-sent,
+        up to max_attempts times. Batch size shrinks automatically so the
+        expected answer fits in max_tokens.
+        
+        Requires a model with complete(), such as PerplexityModel.
+        
+        Returns:
+            One label per input text, in input order. None if an item could not be classified.
+        """
+        if categories is None:
+            categories = ["positive", "negative", "neutral"]
+        
+        # Roughly 4 characters per token, plus JSON punctuation and the index
+        longest = max(len(category) for category in categories)
+        tokens_per_item = longest // 4 + 12
+        batch_size = max(1, min(batch_size, (max_tokens - 20) // tokens_per_item))
+        
+        system_prompt = self._batch_system_prompt(task_type, categories)
+        labels: List[Optional[str]] = [None] * len(texts)
+        pending = list(range(len(texts)))
+        
+        for _ in range(max_attempts):
+            if not pending:
+                break
+            batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+            with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+                answers = pool.map(
+                    lambda batch: self._classify_packed(batch, texts, system_prompt, categories, max_tokens),
+                    batches
+                )
+                for answer in answers:
+                    for index, label in answer.items():
+                        labels[index] = label
+            pending = [index for index in pending if labels[index] is None]
+        
+        return labels
+    
+    def _batch_system_prompt(self, task_type: str, categories: List[str]) -> str:
+        """System prompt for packed multi-item classification"""
+        categories_str = ", ".join(categories)
+        task = {
+            "sentiment": "Analyze the sentiment of each input item",
+            "topic": "Identify the main topic of each input item",
+        }.get(task_type.lower(), f"Classify each input item ({task_type})")
+        
+        return f"""You are a batch {task_type} model.
+
+Task: {task}
+Categories: {categories_str}
+
+Instructions:
+- Each input item is on its own line, formatted as [index] text
+- Choose exactly one category per item from: {categories_str}
+- Respond with only a JSON array, one object per item: [{{"index": 0, "label": "category"}}]
+- Include every index exactly once and nothing else
+"""
+    
+    def _classify_packed(self,
+                         batch: List[int],
+                         texts: List[str],
+                         system_prompt: str,
+                         categories: List[str],
+                         max_tokens: int) -> Dict[int, str]:
+        """Send one packed request and return the valid {index: label} answers"""
+        from .errors import APIRequestError
+        
+        lines = [f"[{index}] {' '.join(str(texts[index]).split())}" for index in batch]
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": "\n".join(lines)}
+        ]
+        
+        try:
+            response_data = self.model.complete(messages, max_tokens=max_tokens, temperature=0.0)
+            content = response_data["choices"][0]["message"]["content"]
+        except (APIRequestError, KeyError, IndexError):
+            return {}
+        
+        # Take the outermost JSON array, ignoring any prose or code fences around it
+        match = re.search(r"\[.*\]", content, re.DOTALL)
+        if not match:
+            return {}
+        try:
+            items = json.loads(match.group(0))
+        except ValueError:
+            return {}
+        
+        allowed = {category.lower(): category for category in categories}
+        wanted = set(batch)
+        answers = {}
+        for item in items if isinstance(items, list) else []:
+            if not isinstance(item, dict):
+                continue
+            index, label = item.get("index"), item.get("label")
+            if isinstance(index, str) and index.isdigit():
+                index = int(index)
+            if index in wanted and isinstance(label, str) and label.strip().lower() in allowed:
+                answers[index] = allowed[label.strip().lower()]
+        return answers
+    
     def clear_tools(self):
         """Clear all active tools and system prompts"""
         self.system_prompts.clear()
         self.active_tools.clear()
+        self.generation.clear()
+        self.user_fields.clear()
         return self
     
-    def get_combined_system_prompt(self) -> str:
-        """Combine all active system prompts"""
+    def get_combined_system_prompt(self, compact: bool = True) -> str:
+        """
+        Combine all active system prompts.
+        By default the result is compacted (see compact_prompt) and cached
+        until a tool is configured or cleared.
+        """
         if not self.system_prompts:
             return ""
         
-        combined = "\n\n".join(self.system_prompts.values())
-        return combined
+        if not compact:
+            return "\n\n".join(self.system_prompts.values())
+        
+        # The same string objects compare by identity, so this check is cheap
+        snapshot = tuple(self.system_prompts.items())
+        if self._compacted is None or self._compacted[0] != snapshot:
+            protected = [value for tool in self.system_prompts for value in self.user_fields.get(tool, [])]
+            self._compacted = (snapshot, compact_prompt(list(self.system_prompts.values()), protected))
+        return self._compacted[1]
     
     def list_active_tools(self) -> List[str]:
         """List currently active tools"""
         return self.active_tools.copy()
+
+
+def compact_prompt(prompts: List[str], protected: Iterable[str] = ()) -> str:
+    """
+    Join system prompts into one with the templates' whitespace normalized,
+    blank lines dropped and instructions repeated across prompts kept only
+    once. Template section headers (lines ending in ':') are kept unless
+    every line under them was a repeat.
+
+    Lines holding any of the protected strings (caller-supplied values such
+    as a chatbot's context) are never dropped, deduplicated or re-spaced,
+    and the values themselves are restored verbatim.
+    """
+    # Swap protected values for placeholders so line handling can't alter them
+    values = sorted({value for value in protected if value and value.strip()}, key=len, reverse=True)
+    placeholders = {}
+    for index, value in enumerate(values):
+        placeholder = f"\x00{index}\x00"
+        placeholders[placeholder] = value
+        prompts = [prompt.replace(value, placeholder) for prompt in prompts]
+    
+    seen = set()
+    lines = []
+    for prompt in prompts:
+        header = None
+        for line in prompt.splitlines():
+            if "\x00" in line:
+                if header:
+                    lines.append(header)
+                    header = None
+                lines.append(line.strip())
+                continue
+            line = _SPACES.sub(" ", line).strip()
+            if not line:
+                continue
+            if line.endswith(":"):
+                header = line
+                continue
+            key = line.lstrip("-* ").lower()
+            if key in seen:
+                continue
+            seen.add(key)
+            if header:
+                lines.append(header)
+                header = None
+            lines.append(line)
+    
+    combined = "\n".join(lines)
+    for placeholder, value in placeholders.items():
+        combined = combined.replace(placeholder, value)
+    return combined
+
+
+def truncate_at_stop(content: str, stop: Optional[List[str]]) -> str:
+    """Cut content at the first stop sequence, in case the API ignored it"""
+    for sequence in stop or []:
+        index = content.find(sequence)
+        if index != -1:
+            content = content[:index]
+    return content
+
+
+def match_choice(content: str, choices: List[str]) -> Optional[str]:
+    """
+    Map a reply onto one of choices, case-insensitively.
+    Accepts the bare choice with stray punctuation or markup around it, or a
+    reply that mentions exactly one choice. Returns None otherwise.
+    """
+    allowed = {choice.lower(): choice for choice in choices}
+    cleaned = content.strip().strip(".,!:;\"'`*_[](){}").strip().lower()
+    if cleaned in allowed:
+        return allowed[cleaned]
+    
+    lowered = content.lower()
+    found = [choice for key, choice in allowed.items() if re.search(rf"\b{re.escape(key)}\b", lowered)]
+    return found[0] if len(found) == 1 else None
@@ -0,0 +1,150 @@
+import threading
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class HTTPTransport:
+    """Pooled, keep-alive HTTP transport shared by models.
+
+    Wraps a single ``requests.Session`` so repeated calls reuse open TCP/TLS
+    connections instead of reconnecting for every prompt. The connection pool
+    is thread-safe, so one transport can serve many models and threads.
+    """
+
+    def __init__(self,
+                 pool_size: int = 10,
+                 connect_timeout: float = 5.0,
+                 read_timeout: float = 60.0,
+                 keep_alive: bool = True):
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.keep_alive = keep_alive
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Connection"] = "keep-alive" if keep_alive else "close"
+
+        # httpx.AsyncClient for aask(), created lazily per event loop
+        self._async_client = None
+        self._async_loop = None
+        self._async_size = 0
+        # Closers of every client on the current loop, including ones replaced by a larger pool
+        self._async_closers = []
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        """(connect, read) timeout tuple passed to every request"""
+        return (self.connect_timeout, self.read_timeout)
+
+    def post(self, url: str, headers: Optional[Dict[str, str]] = None, json: Any = None, **kwargs):
+        """POST through the pooled session using the configured timeouts"""
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.post(url, headers=headers, json=json, **kwargs)
+
+    def async_client(self, min_connections: int = 0):
+        """Return an httpx.AsyncClient bound to the running event loop.
+
+        The client mirrors the session's timeouts and keep-alive setting and
+        holds max(pool_size, min_connections) connections; aask() passes its
+        max_concurrency so it is not capped at pool_size. Asking for more
+        connections than the current client has replaces it with a larger
+        one, leaving the old client to finish its requests.
+
+        A client is closed along with its event loop (asyncio.run() shuts
+        down async generators before closing the loop), and a client left
+        on another loop that is still running is closed there when this
+        transport moves to a new loop.
+        """
+        import asyncio
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        size = max(self.pool_size, min_connections)
+        if self._async_client is None or self._async_loop is not loop or self._async_size < size:
+            previous, previous_loop = self._async_client, self._async_loop
+            if previous_loop is not loop:
+                if previous is not None and previous_loop.is_running():
+                    asyncio.run_coroutine_threadsafe(previous.aclose(), previous_loop)
+                self._async_closers = []
+            
+            limits = httpx.Limits(
+                max_connections=size,
+                max_keepalive_connections=size if self.keep_alive else 0
+            )
+            timeout = httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+            self._async_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+            self._async_loop = loop
+            self._async_size = size
+            self._async_closers.append(self._close_with_loop(loop, self._async_client))
+        return self._async_client
+
+    @staticmethod
+    def _close_with_loop(loop, client):
+        """Arrange for client to be closed when loop shuts down its async generators"""
+        async def closer():
+            try:
+                yield
+            finally:
+                await client.aclose()
+        
+        async def start():
+            await generator.__anext__()
+        
+        # The loop tracks the generator once started and closes it on shutdown_asyncgens()
+        generator = closer()
+        loop.create_task(start())
+        return generator
+
+    async def aclose(self):
+        """Close the async clients for the running event loop"""
+        if self._async_client is not None:
+            closers, self._async_closers = self._async_closers, []
+            for closer in closers:
+                await closer.aclose()
+            await self._async_client.aclose()
+            self._async_client = None
+            self._async_loop = None
+            self._async_size = 0
+
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_sse_data(lines: Iterable[str]) -> Iterator[str]:
+    """Yield the payload of each server-sent event 'data:' line until [DONE]"""
+    for line in lines:
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return
+        yield data
+
+
+_default_transport = None
+_default_lock = threading.Lock()
+
+
+def get_default_transport() -> HTTPTransport:
+    """Return the process-wide transport used by models created without one"""
+    global _default_transport
+    if _default_transport is None:
+        with _default_lock:
+            if _default_transport is None:
+                _default_transport = HTTPTransport()
+    return _default_transport